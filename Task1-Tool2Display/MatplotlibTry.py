@@ -1,18 +1,14 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from matplotlib.collections import PolyCollection
 
-df = pd.read_excel('data.xlsx', index_col=0)
-df[df < 0.73] = np.nan  # 忽略概率小于0.73的值
-
-max_values = df.max(axis=1)
-max_columns = df.idxmax(axis=1)
+from probability_matrix import load_matrix, most_likely
 
-result_df = pd.DataFrame({
-    'Position': df.index,
-    'Amino Acid': max_columns,
-    'Probability': max_values
-})
+# 工作簿只在首次运行或内容变化时解析，之后直接读取缓存的 .npy；概率低于 0.73 的值被忽略
+result_df = most_likely(load_matrix('data.xlsx'))
 
 color_map = {
     'low': 'yellow',    # 0.7 <= Probability < 0.8
@@ -20,35 +16,50 @@ color_map = {
     'high': 'red',      # Probability >= 0.9
     'NaN': 'grey'       # NaN
 }
+# 各颜色等级的下界（含）与上界（不含）
+bins = [0.7, 0.8, 0.9, np.inf]
+labels = ['low', 'medium', 'high']
 
-def map_probability_to_color(probability):
-    if pd.isna(probability):
-        return color_map['NaN']
-    elif 0.7 <= probability < 0.8:
-        return color_map['low']
-    elif 0.8 <= probability < 0.9:
-        return color_map['medium']
-    elif probability >= 0.9:
-        return color_map['high']
+# 一次性把概率分到各等级，缺失值归入 NaN
+result_df['Class'] = pd.cut(result_df['Probability'], bins=bins, labels=labels, right=False).astype(object).fillna('NaN')
+result_df['Color'] = result_df['Class'].map(color_map)
 
-result_df['Color'] = result_df['Probability'].apply(map_probability_to_color)
+# 行数超过该值时不再逐行标注氨基酸（文字会重叠，且每个标注都是一个单独的对象）
+max_labels = 200
 
+n = len(result_df)
+y = np.arange(n)
 
-plt.figure(figsize=(3, 10))
-for i, (index, row) in enumerate(result_df.iterrows()):
-    plt.barh(row['Position'], 1, color=row['Color'], edgecolor='black')
-    if pd.notna(row['Amino Acid']):
-        plt.text(0.5, i, f"{row['Amino Acid']}", ha='center', va='center', color='black', fontsize=12)
+fig, ax = plt.subplots(figsize=(3, 10))
+# 所有条形合并为一个 PolyCollection：每行一个从 (0, y-0.4) 到 (1, y+0.4) 的矩形
+verts = np.empty((n, 4, 2))
+verts[:, :, 0] = [0, 1, 1, 0]
+verts[:, :, 1] = y[:, None] + np.array([-0.4, -0.4, 0.4, 0.4])
+ax.add_collection(PolyCollection(verts, facecolors=result_df['Color'].tolist(), edgecolors='black'))
+ax.set_xlim(0, 1)
+ax.set_ylim(-0.5, n - 0.5)
+
+if n <= max_labels:
+    for i, amino_acid in zip(y[result_df['Amino Acid'].notna().to_numpy()], result_df['Amino Acid'].dropna()):
+        ax.text(0.5, i, f"{amino_acid}", ha='center', va='center', color='black', fontsize=12)
 
 
 plt.ylabel('Position')
-plt.yticks(range(len(result_df)), result_df['Position'])
+if n <= max_labels:
+    plt.yticks(y, result_df['Position'])
+else:
+    # 行数较多时只在部分整数行号处放刻度，刻度文字显示该行对应的位置而不是行号
+    positions = result_df['Position'].to_numpy()
+    ax.yaxis.set_major_locator(MaxNLocator(nbins=20, integer=True))
+    ax.yaxis.set_major_formatter(FuncFormatter(
+        lambda value, _: str(positions[int(value)]) if 0 <= int(value) < n else ''))
 
 plt.xlabel('')
 plt.xticks([])
 
-import matplotlib.patches as mpatches
-legend_handles = [mpatches.Patch(color=color, label=f"{label} Probability") for label, color in color_map.items()]
+# 图例只列出实际出现的等级
+present = set(result_df['Class'])
+legend_handles = [mpatches.Patch(color=color, label=f"{label} Probability") for label, color in color_map.items() if label in present]
 plt.legend(handles=legend_handles, loc='best')
 
 plt.title('Most Likely Amino Acid at Each Position with Probability Range')
@@ -2,17 +2,10 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 
-df = pd.read_excel('data.xlsx', index_col=0)
-df[df < 0.73] = np.nan
+from probability_matrix import load_matrix, most_likely
 
-max_values = df.max(axis=1)
-max_columns = df.idxmax(axis=1)
-
-result_df = pd.DataFrame({
-    'Position': df.index,
-    'Amino Acid': max_columns,
-    'Probability': max_values
-})
+# 工作簿只在首次运行或内容变化时解析，之后直接读取缓存的 .npy；概率低于 0.73 的值被忽略
+result_df = most_likely(load_matrix('data.xlsx'))
 
 color_map = {
     'low': 'yellow',    # 0.7 <= Probability < 0.8
@@ -20,37 +13,44 @@ color_map = {
     'high': 'red',      # Probability >= 0.9
     'NaN': 'grey'       # NaN值
 }
-def map_probability_to_color(probability):
-    if pd.isna(probability):
-        return color_map['NaN']
-    elif 0.7 <= probability < 0.8:
-        return color_map['low']
-    elif 0.8 <= probability < 0.9:
-        return color_map['medium']
-    elif probability >= 0.9:
-        return color_map['high']
-
-result_df['Color'] = result_df['Probability'].apply(map_probability_to_color)
-
-fig = go.Figure()
-
-for i, (index, row) in enumerate(result_df.iterrows(), start=1):
-    fig.add_trace(go.Bar(
-        x=[1],
-        y=[row['Position']],
-        orientation='h',
-        marker=dict(color=row['Color']),
-        name=f"{i}. {row['Amino Acid']}" if pd.notna(row['Amino Acid']) else '',
-        hoverinfo='text',
-        hovertext=f"{row['Amino Acid']}: {row['Probability'] if pd.notna(row['Probability']) else 'N/A'}"
-    ))
+# 各颜色等级的下界（含）与上界（不含）
+bins = [0.7, 0.8, 0.9, np.inf]
+labels = ['low', 'medium', 'high']
+
+# 一次性把概率分到各等级，缺失值归入 NaN
+result_df['Class'] = pd.cut(result_df['Probability'], bins=bins, labels=labels, right=False).astype(object).fillna('NaN')
+result_df['Color'] = result_df['Class'].map(color_map)
+
+# 悬停文字按列拼接
+hover_text = (result_df['Amino Acid'].astype(str) + ': '
+              + result_df['Probability'].map('{}'.format).where(result_df['Probability'].notna(), 'N/A'))
+
+# 所有位置画在同一个条形图 trace 中
+fig = go.Figure(go.Bar(
+    x=np.ones(len(result_df)),
+    y=result_df['Position'],
+    orientation='h',
+    marker=dict(color=result_df['Color'], line=dict(width=0)),
+    text=result_df['Amino Acid'].fillna(''),
+    textposition='inside',
+    insidetextanchor='middle',
+    hoverinfo='text',
+    hovertext=hover_text,
+    showlegend=False
+))
+
+# 图例按颜色等级生成：每个实际出现的等级一个不含数据的条目
+for label, color in color_map.items():
+    if (result_df['Class'] == label).any():
+        fig.add_trace(go.Bar(x=[None], y=[None], marker=dict(color=color), name=f"{label} Probability"))
 
 
 fig.update_layout(
     title='Most Likely Amino Acid at Each Position with Probability Range',
     xaxis=dict(title='Probability', showticklabels=False),
     yaxis=dict(title='Position'),
-    legend_title="Amino Acid",
+    legend_title="Probability",
+    barmode='overlay',  # 图例条目不占用条形的宽度
     height=1000
 )
 
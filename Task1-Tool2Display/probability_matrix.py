@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+# 低于该概率的值视为不可信，不参与结果
+threshold = 0.73
+# 缓存目录（相对于工作簿所在目录）
+cache_dir_name = '.matrix_cache'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ 分块计算文件的 SHA-256 """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(path, cache_dir=None):
+    """ 缓存目录按源文件哈希区分，文件内容变化后自动使用新的目录 """
+    cache_root = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), cache_dir_name)
+    return os.path.join(cache_root, file_hash(path))
+
+
+def _write_sheet(frame, cache_dir, i):
+    """ 工作表的数值保存为 {i}.npy，行列标签写入 {i}.json，标签文件最后写入并原子替换，中断时不会留下不完整的缓存 """
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(os.path.join(cache_dir, f'{i}.npy'), frame.to_numpy(dtype=np.float64))
+    labels = {'index': frame.index.tolist(), 'columns': [str(c) for c in frame.columns]}
+    with open(os.path.join(cache_dir, f'{i}.json.tmp'), 'w', encoding='utf-8') as f:
+        json.dump(labels, f, ensure_ascii=False)
+    os.replace(os.path.join(cache_dir, f'{i}.json.tmp'), os.path.join(cache_dir, f'{i}.json'))
+
+
+def _read_sheet(cache_dir, i):
+    with open(os.path.join(cache_dir, f'{i}.json'), 'r', encoding='utf-8') as f:
+        labels = json.load(f)
+    return pd.DataFrame(np.load(os.path.join(cache_dir, f'{i}.npy')), index=labels['index'], columns=labels['columns'])
+
+
+def _sheet_names(path, cache_dir):
+    """ 工作簿中的工作表名，缓存在 sheets.json 中；只读取工作簿结构，不解析工作表 """
+    names_path = os.path.join(cache_dir, 'sheets.json')
+    if os.path.exists(names_path):
+        with open(names_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    with pd.ExcelFile(path) as book:
+        names = book.sheet_names
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(names_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(names, f, ensure_ascii=False)
+    os.replace(names_path + '.tmp', names_path)
+    return names
+
+
+def _load_sheet(path, cache_dir, names, i):
+    # 缓存未命中时只解析这一个工作表，其他工作表（例如非数值的说明页）不会被读取
+    if not os.path.exists(os.path.join(cache_dir, f'{i}.json')):
+        _write_sheet(pd.read_excel(path, sheet_name=names[i], index_col=0), cache_dir, i)
+    return _read_sheet(cache_dir, i)
+
+
+def load_matrix(path, sheet=0, cache_dir=None):
+    """
+    读取一个蛋白质的 位置 × 氨基酸 概率矩阵，sheet 为工作表名或序号
+    首次读取后按源文件哈希缓存为 .npy，文件内容不变时之后的运行不再解析 Excel
+    """
+    cache_dir = _cache_path(path, cache_dir)
+    names = _sheet_names(path, cache_dir)
+    return _load_sheet(path, cache_dir, names, sheet if isinstance(sheet, int) else names.index(sheet))
+
+
+def load_workbook(path, cache_dir=None):
+    """ 读取全部工作表（每个工作表一个蛋白质），返回 {工作表名: DataFrame} """
+    cache_dir = _cache_path(path, cache_dir)
+    names = _sheet_names(path, cache_dir)
+    return {name: _load_sheet(path, cache_dir, names, i) for i, name in enumerate(names)}
+
+
+def top_k(values, k=1, threshold=threshold):
+    """
+    对每一行取概率最高的 k 个氨基酸，返回 (列序号, 概率)，形状均为 (行数, k)，按概率从高到低排列
+    低于 threshold 或缺失的值概率为 NaN、列序号为 -1
+    """
+    values = np.where(values >= threshold, values, -np.inf)  # NaN 与低于阈值的值都排到最后
+    k = min(k, values.shape[1])
+    # 稳定排序：概率相同时取列序靠前的氨基酸，与 DataFrame.idxmax 一致（argpartition 不保证这一点）
+    indices = np.argsort(-values, axis=1, kind='stable')[:, :k]
+    probabilities = np.take_along_axis(values, indices, axis=1)
+    valid = np.isfinite(probabilities)
+    return np.where(valid, indices, -1), np.where(valid, probabilities, np.nan)
+
+
+def top_residues(frames, k=1, threshold=threshold):
+    """
+    批量处理多个蛋白质：{名称: DataFrame} 的全部位置拼接后一次计算 top-k
+    返回长表，列为 Protein, Position, Rank, Amino Acid, Probability
+    """
+    names = list(frames)
+    columns = pd.Index([])
+    for frame in frames.values():
+        columns = columns.union(frame.columns, sort=False)
+    # 按氨基酸的并集对齐各蛋白质的列，缺少的氨基酸概率为 NaN
+    values = np.concatenate([frames[name].reindex(columns=columns).to_numpy(dtype=np.float64) for name in names])
+    indices, probabilities = top_k(values, k, threshold)
+
+    k = indices.shape[1]
+    lengths = [len(frames[name]) for name in names]
+    amino_acids = np.append(columns.to_numpy(dtype=object), None)[indices]  # -1 对应追加的 None
+    return pd.DataFrame({
+        'Protein': np.repeat(np.repeat(np.array(names, dtype=object), lengths), k),
+        'Position': np.repeat(np.concatenate([frames[name].index.to_numpy() for name in names]), k),
+        'Rank': np.tile(np.arange(1, k + 1), len(values)),
+        'Amino Acid': amino_acids.ravel(),
+        'Probability': probabilities.ravel()
+    })
+
+
+def most_likely(frame, threshold=threshold):
+    """ 每个位置最可能的氨基酸及其概率，列为 Position, Amino Acid, Probability """
+    result = top_residues({'protein': frame}, k=1, threshold=threshold)
+    return result[['Position', 'Amino Acid', 'Probability']].set_index(frame.index)
@@ -1,43 +1,60 @@
 import json
+import os
+import numpy as np
 import pandas as pd
 import folium
+from branca.element import MacroElement
+from jinja2 import Template
+from traffic_cube import TrafficCube, load_day
+
+# 数据目录
+data_dir = 'D:\\My document\\大学\\大三下\\数据可视化\\24Spring-DataVisualization\\Task2-MapData\\data\\温州交通数据data'
 
 # 加载道路数据
-with open('D:\\My document\\大学\\大三下\\数据可视化\\24Spring-DataVisualization\\Task2-MapData\\data\\温州交通数据data\\load_track_detail.json', 'r') as file:
+with open(os.path.join(data_dir, 'load_track_detail.json'), 'r') as file:
     road_data = json.load(file)
 
 # 转换道路数据为 DataFrame
 df_roads = pd.DataFrame(road_data)
 
-# 函数：加载并处理交通流量数据
+# 函数：加载并处理交通流量数据（列式目录、NDJSON 或 JSON，见 traffic_cube.load_day）
 def load_traffic_data(date):
-    filename = f'D:\\My document\\大学\\大三下\\数据可视化\\24Spring-DataVisualization\\Task2-MapData\\data\\温州交通数据data\\five_carflow{date}.json'
-    with open(filename, 'r') as file:
-        traffic_data = json.load(file)
-    return pd.DataFrame(traffic_data)
+    return load_day(data_dir, date)
 
 # 初始化地图
 def init_map(lat, lng):
     return folium.Map(location=[lat, lng], zoom_start=13)
 
+# 向量化地把 lat1..lat4 / lng1..lng4 组装成每条道路的有效坐标点列表，precision 为坐标保留的小数位数
+def build_road_points(df_roads, precision=None):
+    lat = df_roads.reindex(columns=[f'lat{i}' for i in range(1, 5)]).to_numpy(dtype=float)
+    lng = df_roads.reindex(columns=[f'lng{i}' for i in range(1, 5)]).to_numpy(dtype=float)
+    # 跳过 lat 或 lng 为 NaN 的点
+    valid = ~(np.isnan(lat) | np.isnan(lng))
+    coords = np.stack([lat, lng], axis=-1)[valid]
+    # 坐标量化：5 位小数约为 1 米精度，足够显示道路且能明显缩小 HTML
+    if precision is not None:
+        coords = np.round(coords, precision)
+    # 按每条道路的有效点数切分，顺序与 df_roads 一致
+    return [part.tolist() for part in np.split(coords, np.cumsum(valid.sum(axis=1))[:-1])]
+
+# 按道路聚合出最大出车流量，返回 {road_id: 流量}，键和值均为 Python 原生类型
+# 没有出车流量的道路不在结果中，提示框显示为 No data
+def max_flow_by_road(df_traffic):
+    flow_out = df_traffic.groupby('road_id')['car_flow_out'].max().dropna()
+    return dict(zip(flow_out.index.tolist(), flow_out.tolist()))
+
 # 添加道路到地图
 def add_roads_to_map(map_obj, df_roads, df_traffic):
-    for idx, row in df_roads.iterrows():
-        points = []
-        # 确保所有的点都是有效的，跳过 NaN 值
-        for i in range(1, 5):
-            lat = row.get(f'lat{i}')
-            lng = row.get(f'lng{i}')
-            # 添加检查以确保 lat 和 lng 都不是 NaN
-            if pd.notna(lat) and pd.notna(lng):
-                points.append((lat, lng))
+    # 预先按道路聚合出最大出车流量，之后每条道路只需一次字典查找
+    flow_out_by_road = max_flow_by_road(df_traffic)
+    road_points = build_road_points(df_roads)
 
+    for road_id, points in zip(df_roads['id'].tolist(), road_points):
         # 如果存在有效的坐标点则绘制线段
         if points:
-            road_id = row['id']
-            traffic_info = df_traffic[df_traffic['road_id'] == road_id]
             # 获取当前路段的最大出车流量，如果不存在则标记 "No data"
-            car_flow_out = traffic_info['car_flow_out'].max() if not traffic_info.empty else 'No data'
+            car_flow_out = flow_out_by_road.get(road_id, 'No data')
             # 在地图上绘制多段线并附加提示信息
             folium.PolyLine(
                 points,
@@ -45,17 +62,261 @@ def add_roads_to_map(map_obj, df_roads, df_traffic):
                 tooltip=f'Road ID: {road_id}, Car flow out: {car_flow_out}'
             ).add_to(map_obj)
 
+# Douglas-Peucker 折线简化，tolerance 与坐标同单位（度），偏离弦线不超过 tolerance 的中间点被删除
+def simplify_line(points, tolerance):
+    if len(points) <= 2:
+        return points
+    start, end = np.asarray(points[0]), np.asarray(points[-1])
+    middle = np.asarray(points[1:-1])
+    chord = end - start
+    length = np.hypot(*chord)
+    if length == 0:
+        distances = np.hypot(*(middle - start).T)
+    else:
+        distances = np.abs(chord[0] * (middle[:, 1] - start[1]) - chord[1] * (middle[:, 0] - start[0])) / length
+    farthest = int(np.argmax(distances)) + 1
+    if distances[farthest - 1] <= tolerance:
+        return [points[0], points[-1]]
+    return simplify_line(points[:farthest + 1], tolerance)[:-1] + simplify_line(points[farthest:], tolerance)
+
+# 将所有道路组装为一个 GeoJSON FeatureCollection，提示文字与逐条绘制时一致
+def build_roads_geojson(df_roads, df_traffic, precision=None, tolerance=None):
+    flow_out_by_road = max_flow_by_road(df_traffic)
+    features = []
+    for road_id, points in zip(df_roads['id'].tolist(), build_road_points(df_roads, precision)):
+        # LineString 至少需要两个点，单点道路在 PolyLine 模式下同样不可见
+        if len(points) < 2:
+            continue
+        if tolerance:
+            points = simplify_line(points, tolerance)
+        car_flow_out = flow_out_by_road.get(road_id, 'No data')
+        features.append({
+            'type': 'Feature',
+            # GeoJSON 坐标顺序为 [经度, 纬度]
+            'geometry': {'type': 'LineString', 'coordinates': [[lng, lat] for lat, lng in points]},
+            'properties': {
+                'car_flow_out': car_flow_out if isinstance(car_flow_out, (int, float)) else None,
+                'tooltip': f'Road ID: {road_id}, Car flow out: {car_flow_out}'
+            }
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+# 车流量分级配色：(上限, 颜色)，无数据为灰色
+flow_colors = [(10, 'green'), (30, 'orange'), (float('inf'), 'red')]
+
+def flow_style(feature):
+    car_flow_out = feature['properties']['car_flow_out']
+    if car_flow_out is None:
+        return {'color': 'grey', 'weight': 2}
+    color = next(color for upper, color in flow_colors if car_flow_out < upper)
+    return {'color': color, 'weight': 3}
+
+# 以单个 GeoJSON 图层添加所有道路；smooth_factor 交给 Leaflet 在每个缩放级别上简化折线
+def add_roads_geojson_to_map(map_obj, df_roads, df_traffic, precision=5, tolerance=None, smooth_factor=1.5):
+    folium.GeoJson(
+        build_roads_geojson(df_roads, df_traffic, precision, tolerance),
+        name='Roads',
+        style_function=flow_style,
+        smooth_factor=smooth_factor,
+        tooltip=folium.GeoJsonTooltip(fields=['tooltip'], labels=False)
+    ).add_to(map_obj)
+
+# 逐帧流量编码：每 keyframe_interval 帧保存一次完整数值，其余帧只保存相对上一帧发生变化的道路
+# [下标间隔, 差值]；缺失值记为 -1。frames 为按时间顺序产出的一维流量数组
+def encode_flow_frames(frames, keyframe_interval=60):
+    encoded = []
+    previous = None
+    for i, flows in enumerate(frames):
+        current = np.where(np.isnan(flows), -1, np.rint(flows)).astype(np.int64)
+        if i % keyframe_interval == 0:
+            encoded.append(current.tolist())
+        else:
+            delta = current - previous
+            changed = np.flatnonzero(delta)
+            encoded.append([np.diff(changed, prepend=-1).tolist(), delta[changed].tolist()])
+        previous = current
+    return encoded
+
+# 在浏览器端解码帧并只重设发生变化的道路样式，带播放按钮和时间滑块
+class FlowAnimation(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var roads = {{ this.layer.get_name() }};
+            var frames = {{ this.frames_json }};
+            var labels = {{ this.labels_json }};
+            var colors = {{ this.colors_json }};
+            var keyframeInterval = {{ this.keyframe_interval }};
+            var layers = [];
+            var current = null;
+            var position = -1;
+
+            roads.eachLayer(function(layer) {
+                var index = layer.feature.properties.index;
+                if (index >= 0) { layers[index] = layer; }
+                layer.bindTooltip(function() {
+                    var flow = index >= 0 ? current[index] : -1;
+                    return 'Road ID: ' + layer.feature.properties.road_id +
+                        ', Car flow out: ' + (flow < 0 ? 'No data' : flow);
+                });
+            });
+            current = new Int32Array(layers.length);
+
+            function styleFor(flow) {
+                if (flow < 0) { return {color: 'grey', weight: 2}; }
+                for (var i = 0; i < colors.length; i++) {
+                    if (colors[i][0] === null || flow < colors[i][0]) { return {color: colors[i][1], weight: 3}; }
+                }
+            }
+            function applyDelta(frame, changed) {
+                var index = -1;
+                for (var i = 0; i < frame[0].length; i++) {
+                    index += frame[0][i];
+                    current[index] += frame[1][i];
+                    if (changed) { changed.push(index); }
+                }
+            }
+            function restyle(indices) {
+                for (var i = 0; i < indices.length; i++) {
+                    layers[indices[i]].setStyle(styleFor(current[indices[i]]));
+                }
+            }
+            function restyleAll() {
+                for (var i = 0; i < layers.length; i++) {
+                    if (layers[i]) { layers[i].setStyle(styleFor(current[i])); }
+                }
+            }
+            function seek(target) {
+                if (target % keyframeInterval !== 0 && target === position + 1) {
+                    // 顺序播放时只解码一帧，只重设变化的道路
+                    var changed = [];
+                    applyDelta(frames[target], changed);
+                    restyle(changed);
+                } else {
+                    // 跳转时从最近的关键帧开始解码
+                    var start = target - target % keyframeInterval;
+                    current.set(frames[start]);
+                    for (var f = start + 1; f <= target; f++) { applyDelta(frames[f]); }
+                    restyleAll();
+                }
+                position = target;
+                slider.value = target;
+                label.textContent = labels[target];
+            }
+
+            var control = L.control({position: 'bottomleft'});
+            control.onAdd = function() {
+                var div = L.DomUtil.create('div', 'leaflet-bar');
+                div.style.background = 'white';
+                div.style.padding = '6px';
+                div.innerHTML = '<button type="button">&#9654;</button> ' +
+                    '<input type="range" min="0" max="' + (frames.length - 1) + '" value="0" ' +
+                    'style="width: 300px; vertical-align: middle"> <span></span>';
+                L.DomEvent.disableClickPropagation(div);
+                return div;
+            };
+            control.addTo(map);
+            var button = control.getContainer().querySelector('button');
+            var slider = control.getContainer().querySelector('input');
+            var label = control.getContainer().querySelector('span');
+            var timer = null;
+
+            slider.addEventListener('input', function() { seek(+slider.value); });
+            button.addEventListener('click', function() {
+                if (timer) {
+                    clearInterval(timer);
+                    timer = null;
+                    button.innerHTML = '&#9654;';
+                    return;
+                }
+                button.innerHTML = '&#10074;&#10074;';
+                timer = setInterval(function() { seek((position + 1) % frames.length); }, {{ this.interval }});
+            });
+            seek(0);
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, layer, frames, labels, keyframe_interval, interval=200):
+        super().__init__()
+        self._name = 'FlowAnimation'
+        self.layer = layer
+        self.frames_json = json.dumps(frames, separators=(',', ':'))
+        self.labels_json = json.dumps(labels, ensure_ascii=False)
+        self.colors_json = json.dumps([[None if np.isinf(upper) else upper, color] for upper, color in flow_colors])
+        self.keyframe_interval = keyframe_interval
+        self.interval = interval
+
+# 导出覆盖日期范围内每一分钟的动画地图：道路几何只输出一次，每帧只携带编码后的流量
+def export_animated_map(cube, df_roads, output_file, start_date=None, end_date=None,
+                        precision=5, keyframe_interval=60, smooth_factor=1.5):
+    road_position = {road_id: i for i, road_id in enumerate(cube.road_ids.tolist())}
+    features = []
+    columns = []
+    for road_id, points in zip(df_roads['id'].tolist(), build_road_points(df_roads, precision)):
+        if len(points) < 2:
+            continue
+        # 立方体中没有记录的道路始终显示为无数据
+        index = -1
+        if road_id in road_position:
+            index = len(columns)
+            columns.append(road_position[road_id])
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': [[lng, lat] for lat, lng in points]},
+            'properties': {'road_id': road_id, 'index': index}
+        })
+
+    dates = [date for date in cube.dates
+             if (start_date is None or date >= str(start_date)) and (end_date is None or date <= str(end_date))]
+
+    # 按天读取立方体，避免一次性展开整个日期范围
+    def frames():
+        for date in dates:
+            yield from cube.days(date, date)[0][:, columns]
+
+    map_obj = init_map(28.02335324931708, 120.60605406761171)
+    layer = folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        name='Roads',
+        style_function=lambda feature: {'color': 'grey', 'weight': 2},
+        smooth_factor=smooth_factor
+    ).add_to(map_obj)
+    FlowAnimation(
+        layer,
+        encode_flow_frames(frames(), keyframe_interval),
+        [f'{date} {int(time_minute)}' for date in dates for time_minute in cube.times],
+        keyframe_interval
+    ).add_to(map_obj)
+    map_obj.save(output_file)
+
 
 
 # 选择日期和时间（示例：20140101 和 time_minute 为 15）
 selected_date = '20140101'
 selected_time = 15
-df_traffic = load_traffic_data(selected_date)
-df_traffic = df_traffic[df_traffic['time_minute'] == selected_time]  # 筛选特定时间
+cube_dir = os.path.join(data_dir, 'five_carflow_cube')
+if os.path.exists(os.path.join(cube_dir, 'cube.json')):
+    # 已由 traffic_cube.py 构建立方体时直接切片，无需重新加载和筛选
+    df_traffic = TrafficCube(cube_dir).minute_frame(selected_date, selected_time)
+else:
+    df_traffic = load_traffic_data(selected_date)
+    df_traffic = df_traffic[df_traffic['time_minute'] == selected_time]  # 筛选特定时间
 
 # 初始化地图
 map_obj = init_map(28.02335324931708, 120.60605406761171)
-add_roads_to_map(map_obj, df_roads, df_traffic)
+# 绘制方式：'geojson' 为单个 GeoJSON 图层，'polyline' 为逐条道路绘制多段线
+render_mode = 'geojson'
+if render_mode == 'geojson':
+    add_roads_geojson_to_map(map_obj, df_roads, df_traffic)
+else:
+    add_roads_to_map(map_obj, df_roads, df_traffic)
 
 # 保存地图
 map_obj.save('Traffic_Map.html')
+
+# 为 True 时额外导出覆盖全部日期的动画地图（需先运行 traffic_cube.py 构建立方体）
+export_animation = False
+if export_animation:
+    export_animated_map(TrafficCube(cube_dir), df_roads, 'Traffic_Animation.html')
@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from process_sql import file_prefix
+from pipeline import convert_raw_sql
+from columnar import MANIFEST_NAME
+
+# 记录每个日期输入文件大小、修改时间与哈希的清单
+MANIFEST_FILE = "batch_manifest.json"
+
+
+def discover_dates(directory="."):
+    """ 在目录中查找所有 five_carflow{date}.sql 原始文件，返回排好序的日期列表 """
+    pattern = re.compile(rf"{file_prefix}(\d{{8}})\.sql$")
+    dates = [int(match.group(1)) for match in map(pattern.match, os.listdir(directory)) if match]
+    return sorted(dates)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ 分块计算文件的 SHA-256 """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_paths(date, directory="."):
+    """ 某个日期对应的批量 SQL 文件与列式输出目录 """
+    batch_file = os.path.join(directory, f"{file_prefix}{date}_batch.sql")
+    column_dir = os.path.join(directory, f"{file_prefix}{date}")
+    return batch_file, column_dir
+
+
+def outputs_exist(date, directory=".", write_batch=False):
+    batch_file, column_dir = output_paths(date, directory)
+    if write_batch and not os.path.exists(batch_file):
+        return False
+    return os.path.exists(os.path.join(column_dir, MANIFEST_NAME))
+
+
+def convert_date(date, previous, directory=".", force=False, write_batch=False):
+    """ 在工作进程中处理一个日期：必要时计算哈希，内容未变则跳过，否则重新转换 """
+    input_file = os.path.join(directory, f"{file_prefix}{date}.sql")
+    stat = os.stat(input_file)
+    signature = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    # 大小和修改时间都没变时沿用旧哈希，无需重新读取文件
+    if previous and previous["size"] == signature["size"] and previous["mtime"] == signature["mtime"]:
+        signature["sha256"] = previous["sha256"]
+    else:
+        signature["sha256"] = file_hash(input_file)
+
+    if not force and previous and previous["sha256"] == signature["sha256"] and outputs_exist(date, directory, write_batch):
+        return date, signature, False
+
+    table_name = f"{file_prefix}{date}"
+    batch_file, column_dir = output_paths(date, directory)
+    # 单遍解析原始 INSERT 语句，_batch.sql 仅在需要时作为旁路输出
+    convert_raw_sql(input_file, column_dir, table_name, batch_file if write_batch else None)
+    return date, signature, True
+
+
+def load_manifest(directory="."):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, directory="."):
+    # 先写临时文件再替换，避免中断时留下损坏的清单
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def run_batch(dates, directory=".", workers=None, force=False, write_batch=False):
+    """ 用进程池并行转换各日期，已是最新的日期直接跳过，返回实际转换的日期列表 """
+    manifest = load_manifest(directory)
+    converted = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(convert_date, date, manifest.get(str(date)), directory, force, write_batch)
+            for date in dates
+        ]
+        for future in as_completed(futures):
+            date, signature, changed = future.result()
+            manifest[str(date)] = signature
+            if changed:
+                converted.append(date)
+                # 每完成一个日期就落盘，中断后重跑只处理剩余的日期
+                save_manifest(manifest, directory)
+            else:
+                print(f"{file_prefix}{date} 已是最新，跳过")
+
+    save_manifest(manifest, directory)
+    return sorted(converted)
+
+
+if __name__ == "__main__":
+    # 工作进程数，None 表示使用全部 CPU 核心
+    workers = None
+    # 为 True 时忽略清单，强制全部重建
+    force = False
+    # 为 True 时额外生成 _batch.sql
+    write_batch = False
+
+    dates = discover_dates()
+    converted = run_batch(dates, workers=workers, force=force, write_batch=write_batch)
+    print(f"共 {len(dates)} 个日期，本次转换 {len(converted)} 个：{converted}")
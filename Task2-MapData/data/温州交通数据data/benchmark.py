@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，改用 tracemalloc 统计峰值
+    resource = None
+
+from process_sql import file_prefix
+from make_synthetic import write_carflow_sql, write_track_sql
+
+date = 20140101
+table_name = f"{file_prefix}{date}"
+
+
+def run_process_sql(workdir):
+    from process_sql import convert_to_batch
+    return convert_to_batch(os.path.join(workdir, "raw.sql"), os.path.join(workdir, "out_batch.sql"), table_name)
+
+
+def run_convert_sql_to_json(workdir):
+    from sql2json import convert_sql_to_json
+    convert_sql_to_json(os.path.join(workdir, "batch.sql"), os.path.join(workdir, "out.json"), table_name)
+
+
+def run_convert_sql_to_ndjson(workdir):
+    from sql2json import convert_sql_to_ndjson
+    return convert_sql_to_ndjson(os.path.join(workdir, "batch.sql"), os.path.join(workdir, "out.ndjson"), table_name)
+
+
+def run_convert_sql_to_columns(workdir):
+    from sql2json import convert_sql_to_columns
+    return convert_sql_to_columns(os.path.join(workdir, "batch.sql"), os.path.join(workdir, "out_columns"), table_name)
+
+
+def run_pipeline(workdir):
+    from pipeline import convert_raw_sql
+    return convert_raw_sql(os.path.join(workdir, "raw.sql"), os.path.join(workdir, "out_pipeline"), table_name)
+
+
+def run_process_track(workdir):
+    from process_track import load_track_detail
+    return len(load_track_detail(os.path.join(workdir, "track.sql")))
+
+
+# 待测阶段：名称 -> 执行函数
+stages = {
+    "process_sql": run_process_sql,
+    "convert_sql_to_json": run_convert_sql_to_json,
+    "convert_sql_to_ndjson": run_convert_sql_to_ndjson,
+    "convert_sql_to_columns": run_convert_sql_to_columns,
+    "pipeline": run_pipeline,
+    "process_track": run_process_track,
+}
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(stage, workdir):
+    """ 在独立子进程中执行，返回 (耗时秒数, 峰值内存增量字节) """
+    # 先导入依赖，使解释器与库的固定开销不计入增量
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    if resource is None:
+        tracemalloc.start()
+        start = time.perf_counter()
+        stages[stage](workdir)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak
+
+    baseline = peak_rss_bytes()
+    start = time.perf_counter()
+    stages[stage](workdir)
+    elapsed = time.perf_counter() - start
+    return elapsed, peak_rss_bytes() - baseline
+
+
+def prepare_inputs(workdir, rows):
+    """ 生成原始 SQL、批量 SQL 与道路 SQL 三种输入 """
+    from process_sql import convert_to_batch
+    write_carflow_sql(os.path.join(workdir, "raw.sql"), date, rows)
+    convert_to_batch(os.path.join(workdir, "raw.sql"), os.path.join(workdir, "batch.sql"), table_name)
+    write_track_sql(os.path.join(workdir, "track.sql"), rows)
+
+
+def run_benchmark(sizes, stage_names=None):
+    """ 对每个输入规模和阶段各跑一次，返回 [(阶段, 行数, 耗时, 行/秒, 峰值内存增量 MB)] """
+    stage_names = stage_names or list(stages)
+    # 每次测量使用全新的 spawn 进程，峰值内存互不影响
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            prepare_inputs(workdir, rows)
+            for stage in stage_names:
+                with context.Pool(1) as pool:
+                    elapsed, peak = pool.apply(measure, (stage, workdir))
+                results.append((stage, rows, elapsed, rows / elapsed if elapsed else float("inf"), peak / 2 ** 20))
+    return results
+
+
+if __name__ == "__main__":
+    # 输入规模（行数）
+    sizes = [10000, 100000, 1000000]
+
+    results = run_benchmark(sizes)
+    print(f"{'stage':<24}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'peak MB':>10}")
+    for stage, rows, elapsed, rate, peak in results:
+        print(f"{stage:<24}{rows:>10}{elapsed:>10.2f}{rate:>12.0f}{peak:>10.1f}")
@@ -0,0 +1,67 @@
+import os
+import json
+from array import array
+
+import numpy as np
+
+# 列式存储目录中的清单文件名
+MANIFEST_NAME = "manifest.json"
+# 只使用有符号类型：无符号列相减（如 car_flow_in - car_flow_out）会回绕成很大的正数
+SIGNED_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def compact_dtype(values):
+    """ 根据取值范围选出能无损容纳该列的最小有符号整数类型 """
+    if values.size == 0:
+        return np.dtype(np.int32)
+    low, high = values.min(), values.max()
+    for dtype in SIGNED_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def write_columns(rows, output_dir):
+    """ 将 {列名: int} 行迭代器写成每列一个 .npy 文件，并附带 manifest.json，返回行数 """
+    columns = None
+    buffers = None
+    # 用 array 逐列累积，每个值只占 8 字节，而不是一个 dict
+    for row in rows:
+        if columns is None:
+            columns = list(row)
+            buffers = {column: array('q') for column in columns}
+        for column in columns:
+            buffers[column].append(row[column])
+
+    if columns is None:
+        return 0
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {"rows": len(buffers[columns[0]]), "columns": {}}
+    for column in columns:
+        values = np.frombuffer(buffers[column], dtype=np.int64)
+        dtype = compact_dtype(values)
+        np.save(os.path.join(output_dir, f"{column}.npy"), values.astype(dtype))
+        manifest["columns"][column] = dtype.str
+
+    # 清单最后写入，清单存在即表示各列文件已完整
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=4)
+    return manifest["rows"]
+
+
+def load_columns(output_dir):
+    """
+    以内存映射方式打开列式目录，返回 {列名: 只读 ndarray}，不复制数据
+    旧版本写出的无符号列会复制为能容纳它的有符号类型，避免相减时回绕
+    """
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    columns = {}
+    for column in manifest["columns"]:
+        values = np.load(os.path.join(output_dir, f"{column}.npy"), mmap_mode='r')
+        if values.dtype.kind == 'u':
+            values = values.astype(np.promote_types(values.dtype, np.int8))
+        columns[column] = values
+    return columns
@@ -0,0 +1,64 @@
+import os
+import random
+
+from process_sql import file_prefix
+
+
+def write_carflow_sql(output_file, date, rows, roads=20000, seed=0):
+    """ 生成与 five_carflow{date}.sql 格式相同的逐行 INSERT 文件 """
+    rng = random.Random(seed)
+    table_name = f"{file_prefix}{date}"
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(f"DROP TABLE IF EXISTS `{table_name}`;\n")
+        f.write(f"CREATE TABLE `{table_name}` (\n"
+                "  `id` int(11) NOT NULL AUTO_INCREMENT,\n"
+                "  `road_id` int(11) DEFAULT NULL,\n"
+                "  `car_flow_out` int(11) DEFAULT NULL,\n"
+                "  `car_flow_in` int(11) DEFAULT NULL,\n"
+                "  `time_minute` int(11) DEFAULT NULL,\n"
+                "  PRIMARY KEY (`id`)\n"
+                ") ENGINE=InnoDB DEFAULT CHARSET=utf8;\n\n")
+        for i in range(1, rows + 1):
+            f.write(f"INSERT INTO `{table_name}` VALUES ('{i}', '{rng.randrange(1, roads + 1)}', "
+                    f"'{rng.randrange(60)}', '{rng.randrange(60)}', '{rng.randrange(0, 1440, 5)}');\n")
+
+
+def write_track_sql(output_file, rows, seed=0):
+    """ 生成与 load_track_detail.sql 格式相同的文件，含空值和带逗号的字符串 """
+    rng = random.Random(seed)
+    columns = "".join(f"  `lat{i}` double DEFAULT NULL,\n  `lng{i}` double DEFAULT NULL,\n" for i in range(1, 5))
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("DROP TABLE IF EXISTS `load_track_detail`;\n")
+        f.write("CREATE TABLE `load_track_detail` (\n"
+                "  `id` int(11) NOT NULL AUTO_INCREMENT,\n"
+                "  `road_name` varchar(255) DEFAULT NULL,\n"
+                + columns +
+                "  PRIMARY KEY (`id`)\n"
+                ") ENGINE=InnoDB DEFAULT CHARSET=utf8;\n\n")
+        for i in range(1, rows + 1):
+            lat, lng = 27.9 + rng.random() * 0.2, 120.5 + rng.random() * 0.2
+            # 每条道路 2~4 个点，其余坐标为 NULL
+            point_count = rng.randint(2, 4)
+            points = []
+            for j in range(4):
+                if j < point_count:
+                    points += [f"'{lat + j * 0.001:.14f}'", f"'{lng + j * 0.001:.14f}'"]
+                else:
+                    points += ["NULL", "NULL"]
+            f.write(f"INSERT INTO `load_track_detail` VALUES ('{i}', 'Road {i}, Section {rng.randrange(10)}', "
+                    + ", ".join(points) + ");\n")
+
+
+if __name__ == "__main__":
+    # 输出到单独的目录，避免覆盖真实数据
+    output_dir = "synthetic"
+    # 生成行数与日期
+    rows = 1000000
+    dates = range(20140101, 20140115 + 1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for date in dates:
+        write_carflow_sql(os.path.join(output_dir, f"{file_prefix}{date}.sql"), date, rows, seed=date)
+        print(f"已生成 {file_prefix}{date}.sql（{rows} 行）")
+    write_track_sql(os.path.join(output_dir, "load_track_detail.sql"), 20000)
+    print("已生成 load_track_detail.sql")
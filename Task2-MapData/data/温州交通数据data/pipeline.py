@@ -0,0 +1,26 @@
+from process_sql import file_prefix, date_start, date_end, iter_insert_values, tee_batch_sql, parse_rows
+from columnar import write_columns
+
+
+def convert_raw_sql(input_file, output_dir, table_name, batch_file=None):
+    """ 单遍读取原始 five_carflow{date}.sql，直接写出列式数据集；给出 batch_file 时顺带生成批量 SQL """
+    values = iter_insert_values(input_file, table_name)
+    if batch_file:
+        values = tee_batch_sql(values, batch_file, table_name)
+    count = write_columns(parse_rows(values), output_dir)
+    if count:
+        print(f"Column directory '{output_dir}' has been created ({count} rows).")
+    return count
+
+
+if __name__ == "__main__":
+    # 为 True 时额外生成 _batch.sql，便于导入数据库
+    write_batch = False
+
+    for date in range(date_start, date_end + 1):
+        input_file = f"{file_prefix}{date}.sql"
+        batch_file = f"{file_prefix}{date}_batch.sql" if write_batch else None
+        try:
+            convert_raw_sql(input_file, f"{file_prefix}{date}", f"{file_prefix}{date}", batch_file)
+        except FileNotFoundError:
+            print(f"文件 {input_file} 未找到，跳过")
@@ -1,43 +1,66 @@
 import re
+from itertools import chain
 
 # 文件名前缀与日期范围
 file_prefix = "five_carflow"
 date_start = 20140101
 date_end = 20140115
 
-# 遍历日期范围中的每个文件
-for date in range(date_start, date_end + 1):
-    input_file = f"{file_prefix}{date}.sql"
-    output_file = f"{file_prefix}{date}_batch.sql"
-    table_name = f"five_carflow{date}"  # 根据文件名动态设置表名
-
-    try:
-        with open(input_file, "r", encoding="utf-8") as f:
-            content = f.read()
-            # 使用正则表达式匹配所有 INSERT 语句中的值部分
-            inserts = re.findall(r"INSERT INTO `" + table_name + r"` VALUES \((.*?)\);", content)
-            # 处理每一组插入数据，去除单引号
-            processed_inserts = [
-                '(' + re.sub(r"'(\d+)'", r"\1", insert) + ')' for insert in inserts
-            ]
-
-        # 如果找到任何插入语句，将其合并成一个批量插入语句
-        if processed_inserts:
-            bulk_insert_sql = (
-                f"INSERT INTO `{table_name}` "
-                f"(id, road_id, car_flow_out, car_flow_in, time_minute) VALUES\n" +
-                ",\n".join(processed_inserts) + ";"
-            )
-        else:
-            bulk_insert_sql = ""
-
-        # 将批量插入的语句写入新的 .sql 文件中
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("-- 批量插入语句生成\n\n")
-            f.write("SET FOREIGN_KEY_CHECKS=0;\n\n")
-            f.write(bulk_insert_sql)
-
-        print(f"批量插入的 SQL 语句已保存到 {output_file}")
-
-    except FileNotFoundError:
-        print(f"文件 {input_file} 未找到，跳过")
+# five_carflow 表的列顺序
+columns = ["id", "road_id", "car_flow_out", "car_flow_in", "time_minute"]
+
+
+def iter_insert_values(input_file, table_name):
+    """ 逐行读取单行 INSERT 语句，产出去除数字单引号后的值部分字符串 """
+    # 使用正则表达式匹配 INSERT 语句中的值部分
+    insert_pattern = re.compile(r"INSERT INTO `" + table_name + r"` VALUES \((.*?)\);")
+    with open(input_file, "r", encoding="utf-8") as f:
+        for line in f:
+            for match in insert_pattern.finditer(line):
+                yield re.sub(r"'(\d+)'", r"\1", match.group(1))
+
+
+def tee_batch_sql(values, output_file, table_name):
+    """ 在值流经时顺带把它们写成一条批量插入语句，原样产出每个值 """
+    # 先取出第一个值（即先打开输入文件），输入文件不存在时不会留下只有文件头的输出文件
+    values = iter(values)
+    first = next(values, None)
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("-- 批量插入语句生成\n\n")
+        f.write("SET FOREIGN_KEY_CHECKS=0;\n\n")
+        if first is None:
+            return
+        separator = f"INSERT INTO `{table_name}` ({', '.join(columns)}) VALUES\n"
+        for value in chain([first], values):
+            f.write(separator + "(" + value + ")")
+            separator = ",\n"
+            yield value
+        f.write(";")
+
+
+def parse_rows(values):
+    """ 将值部分字符串解析为 {列名: int} 字典；与批量文件再转 JSON 一致，含非整数值的行被忽略 """
+    row_pattern = re.compile(r"[\d, ]+")
+    for value in values:
+        if row_pattern.fullmatch(value):
+            yield {column: int(item) for column, item in zip(columns, value.split(", "))}
+
+
+def convert_to_batch(input_file, output_file, table_name):
+    """ 将逐行 INSERT 的 SQL 文件改写为一条批量插入语句，返回插入的行数 """
+    count = sum(1 for _ in tee_batch_sql(iter_insert_values(input_file, table_name), output_file, table_name))
+    print(f"批量插入的 SQL 语句已保存到 {output_file}")
+    return count
+
+
+if __name__ == "__main__":
+    # 遍历日期范围中的每个文件
+    for date in range(date_start, date_end + 1):
+        input_file = f"{file_prefix}{date}.sql"
+        output_file = f"{file_prefix}{date}_batch.sql"
+        table_name = f"five_carflow{date}"  # 根据文件名动态设置表名
+
+        try:
+            convert_to_batch(input_file, output_file, table_name)
+        except FileNotFoundError:
+            print(f"文件 {input_file} 未找到，跳过")
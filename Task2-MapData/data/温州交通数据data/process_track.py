@@ -1,44 +1,106 @@
 import re
 import json
 
+import numpy as np
+import pandas as pd
 
-def convert_sql_to_json(input_filename, output_filename):
-    # 读取 SQL 文件内容
-    with open(input_filename, 'r', encoding='utf-8') as file:
-        content = file.read()
+# MySQL 列类型到解析类型的映射，未列出的类型（varchar、datetime 等）按字符串处理
+int_types = {'tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint'}
+float_types = {'float', 'double', 'decimal', 'numeric', 'real'}
 
-    # 使用正则表达式提取表字段名称
-    create_table_pattern = re.compile(r"CREATE TABLE `load_track_detail` \((.*?)\),", re.S)
+# 单个值：单引号字符串（支持 \' 与 '' 转义，可包含逗号）或不带引号的字面量（数字、NULL）
+value_pattern = re.compile(r"'((?:[^'\\]|\\.|'')*)'|([^,\s]+)")
+
+
+def parse_schema(content, table_name):
+    """ 从 CREATE TABLE 语句中解析出 [(列名, 'int'/'float'/'string', 是否可为空)] """
+    create_table_pattern = re.compile(rf"CREATE TABLE `{table_name}` \((.*?)\n\)", re.S)
     create_table_content = re.search(create_table_pattern, content)
     if not create_table_content:
+        return None
+
+    schema = []
+    # 只处理以反引号开头的列定义行，跳过 PRIMARY KEY / KEY 等索引定义
+    for line in create_table_content.group(1).splitlines():
+        column_match = re.match(r"\s*`(.*?)`\s+(\w+)", line)
+        if not column_match:
+            continue
+        name, sql_type = column_match.group(1), column_match.group(2).lower()
+        if sql_type in int_types:
+            kind = 'int'
+        elif sql_type in float_types:
+            kind = 'float'
+        else:
+            kind = 'string'
+        schema.append((name, kind, 'NOT NULL' not in line.upper()))
+    return schema
+
+
+def convert_column(quoted, bare, kind, nullable):
+    """ 按列批量转换：quoted 为引号内文本，bare 为无引号字面量，两者逐元素互斥 """
+    quoted = pd.Series(quoted, dtype=object)
+    bare = pd.Series(bare, dtype=object)
+    is_null = bare.str.upper() == 'NULL'
+    is_quoted = bare == ''
+
+    if kind == 'string':
+        # 还原 MySQL 转义，NULL 保留为 None
+        text = quoted.str.replace("''", "'", regex=False).str.replace(r"\\(.)", r"\1", regex=True)
+        return text.where(is_quoted, bare).mask(is_null, None)
+
+    raw = bare.where(~is_quoted, quoted).mask(is_null)
+    values = pd.to_numeric(raw, errors='coerce')
+    if kind == 'float':
+        return values.astype(np.float64)
+    # 可为空或实际出现空值的整数列使用可空整数类型
+    if nullable or values.isna().any():
+        return values.astype('Int64')
+    return values.astype(np.int64)
+
+
+def load_track_detail(input_filename, table_name='load_track_detail'):
+    """ 读取 SQL 文件，按 CREATE TABLE 推导的类型批量解析所有 INSERT 行，返回 DataFrame """
+    with open(input_filename, 'r', encoding='utf-8') as file:
+        content = file.read()
+
+    schema = parse_schema(content, table_name)
+    if not schema:
         print(f"No table creation statement found in {input_filename}")
+        return None
+
+    # 提取所有 INSERT 的值部分，拼接后一次性切分为单个值
+    values_pattern = re.compile(rf"INSERT INTO `{table_name}` VALUES \((.*?)\);", re.S)
+    rows = values_pattern.findall(content)
+    tokens = value_pattern.findall(",".join(rows))
+
+    column_count = len(schema)
+    if len(tokens) != len(rows) * column_count:
+        raise ValueError(
+            f"{input_filename}: expected {len(rows)} rows x {column_count} columns, got {len(tokens)} values")
+
+    # (行, 列, [引号内文本, 无引号字面量]) 的二维视图，逐列转换
+    cells = np.array(tokens, dtype=object).reshape(len(rows), column_count, 2)
+    return pd.DataFrame({
+        name: convert_column(cells[:, index, 0], cells[:, index, 1], kind, nullable)
+        for index, (name, kind, nullable) in enumerate(schema)
+    })
+
+
+def convert_sql_to_json(input_filename, output_filename):
+    df = load_track_detail(input_filename)
+    if df is None:
         return
 
-    # 获取列名
-    columns = re.findall(r"`(.*?)`", create_table_content.group(1))
-
-    # 使用正则表达式提取所有值
-    values_pattern = re.compile(r"INSERT INTO `load_track_detail` VALUES \((.*?)\);", re.S)
-    values = values_pattern.findall(content)
-
-    # 将提取的值转换为字典列表
-    data_list = []
-    for value in values:
-        row_values = value.split(", ")
-        # 格式化行值，处理 'null' 和 数字类型
-        formatted_row = [
-            None if val.strip().lower() == 'null' else float(val.strip("'")) if '.' in val else int(val.strip("'"))
-            for val in row_values
-        ]
-        data_dict = {column: val for column, val in zip(columns, formatted_row)}
-        data_list.append(data_dict)
-
-    # 将字典列表转换为 JSON 并保存到文件
+    # 逐列转为 Python 原生值（缺失值为 None），用 json.dump 按记录列表保存；
+    # 浮点数按最短表示写出（'28.1' 仍为 28.1），与原来的输出一致
+    columns = {name: [None if pd.isna(value) else value for value in df[name].tolist()] for name in df.columns}
+    records = [dict(zip(columns, row)) for row in zip(*columns.values())]
     with open(output_filename, 'w', encoding='utf-8') as json_file:
-        json.dump(data_list, json_file, indent=4)
+        json.dump(records, json_file, indent=4)
 
     print(f"JSON file '{output_filename}' has been created.")
 
 
-# 调用函数，将 `load_track_detail.sql` 转换为 JSON 文件
-convert_sql_to_json("load_track_detail.sql", "load_track_detail.json")
+if __name__ == "__main__":
+    # 调用函数，将 `load_track_detail.sql` 转换为 JSON 文件
+    convert_sql_to_json("load_track_detail.sql", "load_track_detail.json")
@@ -1,6 +1,12 @@
 import re
 import json
 
+from columnar import write_columns
+
+# 流式解析时每次读取的字符数
+CHUNK_SIZE = 1 << 20
+
+
 def convert_sql_to_json(input_filename, output_filename, table_name):
     """ 将 SQL 文件转换为 JSON 文件 """
     # 读取 SQL 文件
@@ -33,12 +39,87 @@ def convert_sql_to_json(input_filename, output_filename, table_name):
 
     print(f"JSON file '{output_filename}' has been created.")
 
-# 循环转换20140101到20140115的文件
-start_date = 20140101
-end_date = 20140115
 
-for date in range(start_date, end_date + 1):
-    sql_filename = f"five_carflow{date}_batch.sql"
-    json_filename = f"five_carflow{date}.json"
-    table_name = f"five_carflow{date}"
-    convert_sql_to_json(sql_filename, json_filename, table_name)
+def iter_sql_rows(input_filename, table_name, chunk_size=CHUNK_SIZE):
+    """ 分块读取批量插入的 SQL 文件，逐行产出 {列名: int} 字典，内存占用与文件大小无关 """
+    header_pattern = re.compile(rf"INSERT INTO `{table_name}` \((.*?)\) VALUES")
+    row_pattern = re.compile(r"\(([\d, ]+)\)")
+    columns = None
+    buffer = ""
+
+    with open(input_filename, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            buffer += chunk
+
+            # 先定位批量插入语句的列名
+            if columns is None:
+                header = header_pattern.search(buffer)
+                if not header:
+                    if not chunk:
+                        print(f"No columns found in {input_filename}")
+                        return
+                    # 表头可能被切断，只保留尾部等待下一块
+                    buffer = buffer[-4096:]
+                    continue
+                columns = header.group(1).split(", ")
+                buffer = buffer[header.end():]
+
+            # 只消费以右括号结尾的完整元组，被切断的元组留到下一块
+            last_end = 0
+            for match in row_pattern.finditer(buffer):
+                yield {column: int(value) for column, value in zip(columns, match.group(1).split(", "))}
+                last_end = match.end()
+
+            if not chunk:
+                return
+            buffer = buffer[last_end:]
+            start = buffer.rfind("(")
+            buffer = buffer[start:] if start >= 0 else ""
+
+
+def convert_sql_to_ndjson(input_filename, output_filename, table_name, chunk_size=CHUNK_SIZE):
+    """ 流式地将 SQL 文件转换为换行分隔的 JSON (NDJSON) 文件，返回写入的行数 """
+    rows = iter_sql_rows(input_filename, table_name, chunk_size)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+
+    count = 0
+    with open(output_filename, 'w', encoding='utf-8') as json_file:
+        json_file.write(json.dumps(first_row) + "\n")
+        count += 1
+        # 逐行写出，不在内存中累积整张表
+        for row in rows:
+            json_file.write(json.dumps(row) + "\n")
+            count += 1
+
+    print(f"NDJSON file '{output_filename}' has been created ({count} rows).")
+    return count
+
+
+def convert_sql_to_columns(input_filename, output_dir, table_name, chunk_size=CHUNK_SIZE):
+    """ 将 SQL 文件转换为列式 .npy 目录，可被 numpy 直接内存映射读取 """
+    count = write_columns(iter_sql_rows(input_filename, table_name, chunk_size), output_dir)
+    if count:
+        print(f"Column directory '{output_dir}' has been created ({count} rows).")
+    return count
+
+
+if __name__ == "__main__":
+    # 输出格式：'columns' 为列式 .npy 目录，'ndjson' 为流式逐行写出，'json' 为原先的整体缩进 JSON
+    output_format = 'columns'
+
+    # 循环转换20140101到20140115的文件
+    start_date = 20140101
+    end_date = 20140115
+
+    for date in range(start_date, end_date + 1):
+        sql_filename = f"five_carflow{date}_batch.sql"
+        table_name = f"five_carflow{date}"
+        if output_format == 'columns':
+            convert_sql_to_columns(sql_filename, f"five_carflow{date}", table_name)
+        elif output_format == 'ndjson':
+            convert_sql_to_ndjson(sql_filename, f"five_carflow{date}.ndjson", table_name)
+        else:
+            convert_sql_to_json(sql_filename, f"five_carflow{date}.json", table_name)
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+# 列式目录的读写在数据处理脚本所在目录的 columnar.py 中
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', '温州交通数据data'))
+from columnar import load_columns
+
+# 立方体中保存的流量指标
+measures = ('car_flow_in', 'car_flow_out')
+
+
+# 读取某一天的车流数据，依次尝试列式目录、NDJSON 与 JSON
+def load_day(data_dir, date):
+    base = os.path.join(data_dir, f'five_carflow{date}')
+    # 列式目录的各列以内存映射方式打开，不解析也不复制
+    if os.path.exists(os.path.join(base, 'manifest.json')):
+        return pd.DataFrame(load_columns(base), copy=False)
+    if os.path.exists(base + '.ndjson'):
+        return pd.read_json(base + '.ndjson', lines=True)
+    with open(base + '.json', 'r') as file:
+        return pd.DataFrame(json.load(file))
+
+
+# 由逐日数据构建 (日期, time_minute, road_id) 三维立方体，每个指标一个可内存映射的 .npy 文件
+def build_cube(data_dir, dates, cube_dir):
+    dates = [str(date) for date in dates]
+
+    # 第一遍：收集所有出现过的时间与道路，确定坐标轴
+    times, road_ids = [], []
+    for date in dates:
+        df = load_day(data_dir, date)
+        times.append(np.unique(df['time_minute']))
+        road_ids.append(np.unique(df['road_id']))
+    times = np.unique(np.concatenate(times)) if times else np.array([], dtype=np.int64)
+    road_ids = np.unique(np.concatenate(road_ids)) if road_ids else np.array([], dtype=np.int64)
+
+    os.makedirs(cube_dir, exist_ok=True)
+    np.save(os.path.join(cube_dir, 'time_minute.npy'), times)
+    np.save(os.path.join(cube_dir, 'road_id.npy'), road_ids)
+
+    # 第二遍：逐日写入，缺失值为 NaN，同一道路同一分钟重复出现时取最大值
+    shape = (len(dates), len(times), len(road_ids))
+    cubes = {}
+    for measure in measures:
+        cubes[measure] = np.lib.format.open_memmap(
+            os.path.join(cube_dir, f'{measure}.npy'), mode='w+', dtype=np.float32, shape=shape)
+        cubes[measure][:] = np.nan
+    for day_index, date in enumerate(dates):
+        df = load_day(data_dir, date)
+        time_index = np.searchsorted(times, df['time_minute'].to_numpy())
+        road_index = np.searchsorted(road_ids, df['road_id'].to_numpy())
+        for measure in measures:
+            np.fmax.at(cubes[measure][day_index], (time_index, road_index),
+                       df[measure].to_numpy(dtype=np.float32))
+    for cube in cubes.values():
+        cube.flush()
+
+    # 清单最后写入，清单存在即表示立方体已完整
+    with open(os.path.join(cube_dir, 'cube.json'), 'w') as file:
+        json.dump({'dates': dates, 'measures': list(measures), 'shape': list(shape)}, file, indent=4)
+    print(f"Traffic cube '{cube_dir}' has been created with shape {shape}.")
+
+
+class TrafficCube:
+    """ build_cube 生成的立方体的只读视图：切片均为内存映射数组上的视图，只需一次下标查找，缺失值为 NaN """
+
+    def __init__(self, cube_dir):
+        with open(os.path.join(cube_dir, 'cube.json'), 'r') as file:
+            manifest = json.load(file)
+        self.dates = manifest['dates']
+        self.times = np.load(os.path.join(cube_dir, 'time_minute.npy'))
+        self.road_ids = np.load(os.path.join(cube_dir, 'road_id.npy'))
+        self.cubes = {
+            measure: np.load(os.path.join(cube_dir, f'{measure}.npy'), mmap_mode='r')
+            for measure in manifest['measures']
+        }
+        # 坐标值到下标的映射，查找为 O(1)
+        self._date_index = {date: i for i, date in enumerate(self.dates)}
+        self._time_index = {int(t): i for i, t in enumerate(self.times)}
+        self._road_index = {int(r): i for i, r in enumerate(self.road_ids)}
+
+    def minute(self, date, time_minute, measure='car_flow_out'):
+        """ 某天某一分钟所有道路的流量，顺序与 road_ids 一致 """
+        return self.cubes[measure][self._date_index[str(date)], self._time_index[int(time_minute)]]
+
+    def road(self, road_id, measure='car_flow_out', start_date=None, end_date=None):
+        """ 某条道路在各天各分钟的流量，形状为 (天, 分钟)，可限定日期范围 """
+        days = self._day_slice(start_date, end_date)
+        return self.cubes[measure][days, :, self._road_index[int(road_id)]]
+
+    def days(self, start_date, end_date, measure='car_flow_out'):
+        """ 闭区间日期范围内的 (天, 分钟, 道路) 数据块 """
+        return self.cubes[measure][self._day_slice(start_date, end_date)]
+
+    def minute_frame(self, date, time_minute):
+        """ 以 five_carflow 行格式返回某一分钟的数据，去掉无数据的道路 """
+        df = pd.DataFrame({'road_id': self.road_ids, 'time_minute': int(time_minute)})
+        for measure in self.cubes:
+            df[measure] = self.minute(date, time_minute, measure)
+        df = df.dropna(subset=list(self.cubes), how='all')
+        return df.astype({measure: 'Int64' for measure in self.cubes})
+
+    def _day_slice(self, start_date, end_date):
+        start = 0 if start_date is None else self._date_index[str(start_date)]
+        end = len(self.dates) - 1 if end_date is None else self._date_index[str(end_date)]
+        return slice(start, end + 1)
+
+
+if __name__ == '__main__':
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', '温州交通数据data')
+    build_cube(data_dir, range(20140101, 20140115 + 1), os.path.join(data_dir, 'five_carflow_cube'))
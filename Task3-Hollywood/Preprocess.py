@@ -1,5 +1,34 @@
 import pandas as pd
 import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+# 只依赖分区路径的小模块，不导入仪表盘的 dataset / metrics / search_index
+from partitions import partition_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 没有 pyarrow 时退回到按年份的 JSON 行文件
+    pa = None
+
+# 输出数据集的列及类型，仪表盘按这些列名读取
+schema_fields = [
+    ('film', 'string'),
+    ('genre', 'string'),
+    ('major_studio', 'string'),
+    ('rotten_tomatoes', 'int16'),
+    ('audience_score', 'int16'),
+    ('domestic_gross', 'float64'),
+    ('foreign_gross', 'float64'),
+    ('worldwide_gross', 'float64'),
+    ('budget', 'float64'),
+    ('oscar', 'string'),
+    ('bafta', 'string'),
+]
+# 记录每个年份源文件大小与修改时间的清单，未变化的年份不再处理
+manifest_name = "preprocess_manifest.json"
+
 
 def preprocess_data(file_path):
     data = pd.read_csv(file_path)
@@ -10,26 +39,100 @@ def preprocess_data(file_path):
         data[col] = pd.to_numeric(data[col].replace('[\$,]', '', regex=True), errors='coerce')
     return data
 
+# 按 schema_fields 选出并转换各列，缺少的列补为空值并打印提示，source 为提示中显示的来源
+def apply_schema(data, source=None):
+    missing = [name for name, _ in schema_fields if name not in data]
+    if missing:
+        print(f"Missing columns in {source or 'data'}, filled with nulls: {', '.join(missing)}")
+    typed = pd.DataFrame(index=data.index)
+    for name, kind in schema_fields:
+        column = data[name] if name in data else pd.Series(None, index=data.index, dtype=object)
+        if kind == 'string':
+            typed[name] = column.astype(object).where(column.notna(), None).map(lambda v: v if v is None else str(v))
+        elif kind.startswith('int'):
+            typed[name] = pd.to_numeric(column, errors='coerce').round().astype(kind.capitalize())
+        else:
+            typed[name] = pd.to_numeric(column, errors='coerce').astype(kind)
+    return typed.reset_index(drop=True)
+
+def arrow_schema():
+    return pa.schema([(name, getattr(pa, kind)()) for name, kind in schema_fields])
+
 def save_data_to_json(data, output_filename):
     # 将 DataFrame 保存为 JSON 文件
     data.to_json(output_filename, orient='records', lines=True)
 
-def process_files(directory, start_year, end_year):
+def save_data_to_parquet(data, output_filename):
+    # 先写临时文件再替换，读取方不会看到写了一半的文件
+    os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+    table = pa.Table.from_pandas(data, schema=arrow_schema(), preserve_index=False)
+    pq.write_table(table, output_filename + ".tmp")
+    os.replace(output_filename + ".tmp", output_filename)
+
+def source_path(directory, year):
+    return os.path.join(directory, f"Most Profitable Hollywood Stories - US {year}.csv")
+
+def output_path(directory, year):
+    if pa is None:
+        return os.path.join(directory, f"{year}_data.json")
+    return partition_path(directory, year)
+
+# 在工作进程中处理一个年份，返回 (年份, 源文件签名)
+def process_year(directory, year):
+    file_path = source_path(directory, year)
+    output = output_path(directory, year)
+    print(f"Processing file: {file_path}")
+    yearly_data = apply_schema(preprocess_data(file_path), file_path)
+    if pa is None:
+        save_data_to_json(yearly_data, output)  # 保存该年份的数据到 JSON
+    else:
+        save_data_to_parquet(yearly_data, output)  # 保存到按年份分区的 Parquet 数据集
+    print(f"Data for {year} saved to {output}")
+    stat = os.stat(file_path)
+    return year, {"size": stat.st_size, "mtime": stat.st_mtime_ns, "schema": schema_fields, "format": os.path.splitext(output)[1]}
+
+def load_manifest(directory):
+    path = os.path.join(directory, manifest_name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, directory):
+    path = os.path.join(directory, manifest_name)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def is_unchanged(directory, year, previous):
+    stat = os.stat(source_path(directory, year))
+    return (previous is not None and os.path.exists(output_path(directory, year))
+            and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime_ns
+            and [tuple(field) for field in previous["schema"]] == schema_fields
+            and previous["format"] == os.path.splitext(output_path(directory, year))[1])
+
+def process_files(directory, start_year, end_year, workers=None, force=False):
+    manifest = load_manifest(directory)
+    pending = []
     for year in range(start_year, end_year + 1):
-        file_name = f"Most Profitable Hollywood Stories - US {year}.csv"
-        file_path = os.path.join(directory, file_name)
-        json_output_path = os.path.join(directory, f"{year}_data.json")  # 定义每个年份的 JSON 输出路径
-        if os.path.exists(file_path):
-            print(f"Processing file: {file_path}")
-            yearly_data = preprocess_data(file_path)
-            save_data_to_json(yearly_data, json_output_path)  # 保存该年份的数据到 JSON
-            print(f"Data for {year} saved to {json_output_path}")
-        else:
+        file_path = source_path(directory, year)
+        if not os.path.exists(file_path):
             print(f"File not found: {file_path}")
+        elif not force and is_unchanged(directory, year, manifest.get(str(year))):
+            print(f"Skipping {year}: unchanged")
+        else:
+            pending.append(year)
+
+    # 各年份互不相关，并行处理
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for year, signature in pool.map(process_year, [directory] * len(pending), pending):
+            manifest[str(year)] = signature
+    save_manifest(manifest, directory)
 
-# 示例调用
-directory = r'D:\My document\大学\大三下\数据可视化\24Spring-DataVisualization\Task3-Hollywood\好莱坞电影数据集\Hollywood Movie Dataset'
-start_year = 2007
-end_year = 2011
+if __name__ == "__main__":
+    # 示例调用
+    directory = r'D:\My document\大学\大三下\数据可视化\24Spring-DataVisualization\Task3-Hollywood\好莱坞电影数据集\Hollywood Movie Dataset'
+    start_year = 2007
+    end_year = 2011
 
-process_files(directory, start_year, end_year)
+    process_files(directory, start_year, end_year)
@@ -0,0 +1,78 @@
+// 浏览器端筛选：tree-store 中保存了全部年份的树（按列存储），这里只根据年份范围、树类型和搜索值
+// 选出需要显示的节点并重新组装图表数据，不访问服务器。与 main.py 中 update_tree 和 filter_graph 的逻辑一致。
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    tree: {
+        filter_tree: function(store, yearRange, treeType, searchValue) {
+            if (!store) {
+                return window.dash_clientside.no_update;
+            }
+            var tree = store[treeType];
+            if (!tree) {
+                return {data: [], layout: store.layout};
+            }
+            var n = tree.name.length;
+            var visible = new Array(n).fill(false);
+
+            // 年份范围内的电影及其所有上级节点可见
+            for (var i = 0; i < n; i++) {
+                var year = tree.year[i];
+                if (year !== null && year >= yearRange[0] && year <= yearRange[1]) {
+                    for (var j = i; j >= 0 && !visible[j]; j = tree.parent[j]) {
+                        visible[j] = true;
+                    }
+                }
+            }
+
+            // 搜索：保留名称匹配的节点及其可见的子节点，匹配的叶子节点同时保留其上级节点
+            if (searchValue) {
+                var query = searchValue.toLowerCase();
+                var children = tree.name.map(function() { return []; });
+                for (var c = 0; c < n; c++) {
+                    if (visible[c] && tree.parent[c] >= 0) {
+                        children[tree.parent[c]].push(c);
+                    }
+                }
+                var keep = new Array(n).fill(false);
+                for (var k = 0; k < n; k++) {
+                    if (!visible[k] || tree.name[k].toLowerCase().indexOf(query) < 0) {
+                        continue;
+                    }
+                    keep[k] = true;
+                    children[k].forEach(function(child) { keep[child] = true; });
+                    if (children[k].length === 0 && tree.parent[k] >= 0) {
+                        keep[tree.parent[k]] = true;
+                    }
+                }
+                visible = keep;
+            }
+
+            var edgeX = [], edgeY = [], nodeX = [], nodeY = [], color = [], text = [];
+            for (var m = 0; m < n; m++) {
+                if (!visible[m]) {
+                    continue;
+                }
+                var parent = tree.parent[m];
+                if (parent >= 0 && visible[parent]) {
+                    edgeX.push(tree.x[parent], tree.x[m], null);
+                    edgeY.push(tree.y[parent], tree.y[m], null);
+                }
+                nodeX.push(tree.x[m]);
+                nodeY.push(tree.y[m]);
+                color.push(tree.level[m]);
+                text.push(tree.hover[m]);
+            }
+
+            // 节点较多时改用 WebGL 渲染
+            var type = nodeX.length > store.webgl_threshold ? 'scattergl' : 'scatter';
+            return {
+                data: [
+                    {type: type, mode: 'lines', x: edgeX, y: edgeY,
+                     line: {width: 1.5, color: '#888'}, hoverinfo: 'none'},
+                    {type: type, mode: 'markers', x: nodeX, y: nodeY, text: text, hoverinfo: 'text',
+                     marker: Object.assign({}, store.marker, {color: color})}
+                ],
+                layout: store.layout
+            };
+        }
+    }
+});
@@ -0,0 +1,127 @@
+import sys
+import time
+import tempfile
+import tracemalloc
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，改用 tracemalloc 统计峰值
+    resource = None
+
+from make_synthetic import write_movies
+
+start_year = 1990
+end_year = 2019
+# 搜索基准使用的查询（匹配一个类型节点及其全部电影）
+search_value = 'Comedy'
+# 各布局能在合理时间内完成的最大电影数，超过时跳过
+layout_film_limits = {'spring': 20000, 'kamada_kawai': 2000}
+
+
+# 只导入 trees 而不导入 main：导入 main 会预加载数据、冻结 GC 并打开磁盘缓存，使测量结果失真
+def prepare(stage, directory, layout):
+    """ 准备待测阶段的输入，这部分不计入测量 """
+    import trees
+    from dataset import YearDataset
+    from search_index import SearchIndex
+    if stage == 'load_data':
+        return {}
+    data = YearDataset(directory).load(start_year, end_year)
+    inputs = {'data': data}
+    if stage in ('filter_graph', 'visualize_tree', 'serialize'):
+        inputs['tree'] = trees.build_genre_tree(data)
+    if stage == 'filter_graph':
+        inputs['index'] = SearchIndex.from_data(data)
+    if stage == 'serialize':
+        inputs['figure'] = trees.visualize_tree(inputs['tree'], layout)
+    return inputs
+
+
+def run_stage(stage, directory, layout, inputs):
+    import trees
+    from dataset import YearDataset
+    if stage == 'load_data':
+        return YearDataset(directory).load(start_year, end_year)
+    if stage == 'build_genre_tree':
+        return trees.build_genre_tree(inputs['data'])
+    if stage == 'build_studio_tree':
+        return trees.build_studio_tree(inputs['data'])
+    if stage == 'filter_graph':
+        return trees.filter_graph(inputs['tree'], search_value, inputs['index'])
+    if stage == 'visualize_tree':
+        return trees.visualize_tree(inputs['tree'], layout)
+    if stage == 'serialize':
+        return inputs['figure'].to_json()
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+# 待测阶段；visualize_tree 与 serialize 对每种布局各测一次
+stages = ['load_data', 'build_genre_tree', 'build_studio_tree', 'filter_graph', 'visualize_tree', 'serialize']
+layout_stages = {'visualize_tree', 'serialize'}
+
+
+def timed_call(function, *args):
+    """ 执行 function(*args)，返回 (结果, 耗时秒数, 峰值内存增量字节) """
+    if resource is None:
+        tracemalloc.start()
+    else:
+        # ru_maxrss 在 Linux 上以 KB 为单位，在 macOS 上以字节为单位
+        unit = 1 if sys.platform == "darwin" else 1024
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    if resource is None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit - baseline
+    return result, elapsed, peak
+
+
+def measure(stage, directory, layout=None):
+    """ 在独立子进程中执行，返回 (耗时秒数, 峰值内存增量字节, 图表 JSON 字节数或 None) """
+    from metrics import configure_logging
+    # 关闭逐阶段日志
+    configure_logging('WARNING')
+    inputs = prepare(stage, directory, layout)
+    result, elapsed, peak = timed_call(run_stage, stage, directory, layout, inputs)
+
+    if stage == 'visualize_tree':
+        return elapsed, peak, len(result.to_json())
+    if stage == 'serialize':
+        return elapsed, peak, len(result)
+    return elapsed, peak, None
+
+
+def run_benchmark(sizes, layouts, stage_names=None):
+    """ 对每个规模、阶段（和布局）各跑一次，返回 [(阶段, 布局, 电影数, 耗时, 峰值内存增量 MB, 图表 JSON MB)] """
+    stage_names = stage_names or stages
+    # 每次测量使用全新的 spawn 进程，布局缓存和峰值内存互不影响
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for films in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            films = write_movies(directory, start_year, end_year, films)
+            for stage in stage_names:
+                for layout in (layouts if stage in layout_stages else [None]):
+                    if layout in layout_film_limits and films > layout_film_limits[layout]:
+                        continue
+                    with context.Pool(1) as pool:
+                        elapsed, peak, size = pool.apply(measure, (stage, directory, layout))
+                    results.append((stage, layout or '-', films, elapsed, peak / 2 ** 20,
+                                    None if size is None else size / 2 ** 20))
+    return results
+
+
+if __name__ == "__main__":
+    # 电影总数与要比较的布局
+    sizes = [1000, 10000, 100000, 300000]
+    layouts = ['tree', 'radial', 'circular', 'shell', 'spring', 'kamada_kawai']
+
+    results = run_benchmark(sizes, layouts)
+    print(f"{'stage':<20}{'layout':<14}{'films':>8}{'seconds':>10}{'peak MB':>10}{'JSON MB':>10}")
+    for stage, layout, films, elapsed, peak, size in results:
+        json_size = '' if size is None else f"{size:.2f}"
+        print(f"{stage:<20}{layout:<14}{films:>8}{elapsed:>10.2f}{peak:>10.1f}{json_size:>10}")
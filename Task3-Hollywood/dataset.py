@@ -0,0 +1,202 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+from metrics import logger, format_fields
+from partitions import partition_path
+from search_index import SearchIndex
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 没有 pyarrow 时只读取 JSON 行文件
+    pq = None
+
+# 节点悬停提示的格式，金额字段为已格式化的字符串
+hover_template = (
+    "{name}<br>Genre: {genre}<br>Rating: Rotten Tomatoes {rotten_tomatoes}%, Audience {audience_score}%"
+    "<br>Domestic Gross: ${domestic_gross}m<br>Foreign Gross: ${foreign_gross}m<br>Worldwide Gross: ${worldwide_gross}m"
+    "<br>Budget: ${budget}m<br>Oscar: {oscar}<br>Bafta: {bafta}"
+)
+money_columns = ['domestic_gross', 'foreign_gross', 'worldwide_gross', 'budget']
+text_columns = ['name', 'genre', 'rotten_tomatoes', 'audience_score', 'oscar', 'bafta']
+# 树和悬停文字用到的列，读取 Parquet 时只加载这些列
+view_columns = ['film', 'genre', 'major_studio', 'rotten_tomatoes', 'audience_score', 'oscar', 'bafta'] + money_columns
+
+
+def film_hover_text(data):
+    """Build the hover text of every film column-wise, in the format of hover_template."""
+    fields = {}
+    for column in text_columns:
+        source = data['film'] if column == 'name' else data.get(column)
+        if source is None:
+            fields[column] = pd.Series('N/A', index=data.index)
+        else:
+            fields[column] = source.astype(object).where(source.notna(), 'N/A').astype(str)
+    for column in money_columns:
+        values = pd.to_numeric(data[column], errors='coerce') if column in data else pd.Series(0.0, index=data.index)
+        fields[column] = values.fillna(0).map('{:,.0f}'.format)
+
+    # 按模板把各列依次拼接为一列字符串
+    pieces = hover_template.replace('}', '{').split('{')
+    text = pd.Series('', index=data.index)
+    for i, piece in enumerate(pieces):
+        text = text + (fields[piece] if i % 2 else piece)
+    return text
+
+
+class YearDataset:
+    """
+    Process-wide cache of the preprocessed per-year data.
+
+    A year is read from its Parquet partition when pyarrow is available and the
+    partition exists (only view_columns are loaded), otherwise from
+    {year}_data.json. Only the years of a requested range are opened. Each year is
+    parsed once and kept in memory; a year is reloaded only when the
+    modification time of its file changes, and a file that failed to parse is
+    not retried until it changes. Year ranges are concatenated from memory; only
+    the `max_ranges` most recently used ranges (and their search indexes) are kept.
+    """
+
+    def __init__(self, directory, max_ranges=8):
+        self.directory = directory
+        self.max_ranges = max_ranges
+        self._years = {}  # year -> (mtime, DataFrame 或读取失败时为 None)
+        self._ranges = OrderedDict()  # (start_year, end_year) -> (mtimes, DataFrame)
+        self._indexes = OrderedDict()  # (start_year, end_year) -> (mtimes, SearchIndex)，通常只有覆盖全部年份的一个
+        self._lock = threading.Lock()
+
+    def _file_path(self, year):
+        if pq is not None:
+            parquet_path = partition_path(self.directory, year)
+            if os.path.exists(parquet_path):
+                return parquet_path
+        return os.path.join(self.directory, f"{year}_data.json")
+
+    @staticmethod
+    def _read_parquet(file_path):
+        table = pq.read_table(file_path, columns=[c for c in view_columns if c in pq.read_schema(file_path).names])
+        # 整数列使用可空类型，含缺失值时也不会变成浮点数
+        return table.to_pandas(types_mapper={pa.int16(): pd.Int16Dtype(), pa.int64(): pd.Int64Dtype()}.get)
+
+    def _mtime(self, year):
+        try:
+            return os.stat(self._file_path(year)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_year(self, year):
+        file_path = self._file_path(year)
+        try:
+            if file_path.endswith('.parquet'):
+                yearly_data = self._read_parquet(file_path)
+            else:
+                yearly_data = pd.read_json(file_path, lines=True)
+        except (ValueError, OSError) as e:
+            logger.error(format_fields(event='read_error', path=file_path, error=str(e)))
+            return None
+        yearly_data['Year'] = year
+        yearly_data.columns = yearly_data.columns.str.strip().str.replace(" ", "_").str.lower()
+        # 加载时一次性生成悬停文字，回调中不再逐个节点格式化
+        if 'film' in yearly_data:
+            yearly_data['hover_text'] = film_hover_text(yearly_data)
+        # 只在首次加载或文件变化时记录
+        logger.info(format_fields(event='year_loaded', year=year, rows=yearly_data.shape[0], columns=yearly_data.shape[1]))
+        return yearly_data
+
+    def _entry(self, year):
+        mtime = self._mtime(year)
+        cached = self._years.get(year)
+        if cached is not None and cached[0] == mtime:
+            return cached
+        with self._lock:
+            # 加锁后再检查一次，避免并发请求重复解析同一个文件
+            cached = self._years.get(year)
+            if cached is not None and cached[0] == mtime:
+                return cached
+            if mtime is None:
+                logger.warning(format_fields(event='file_not_found', path=self._file_path(year)))
+                self._years.pop(year, None)
+                return None, None
+            # 读取失败也记录下来，文件修改前不再重复读取
+            self._years[year] = (mtime, self._read_year(year))
+            return self._years[year]
+
+    def _cached(self, cache, key, mtimes):
+        """Look up key in an LRU cache, returning the value only if it was built from the same mtimes."""
+        with self._lock:
+            cached = cache.get(key)
+            if cached is None or cached[0] != mtimes:
+                return None
+            cache.move_to_end(key)
+            return cached[1]
+
+    def _store(self, cache, key, mtimes, value):
+        with self._lock:
+            cache[key] = (mtimes, value)
+            cache.move_to_end(key)
+            while len(cache) > self.max_ranges:
+                cache.popitem(last=False)
+
+    def year(self, year):
+        """Return the rows of one year, re-reading the file only if its mtime changed."""
+        return self._entry(year)[1]
+
+    def _load_range(self, start_year, end_year):
+        entries = [self._entry(year) for year in range(start_year, end_year + 1)]
+        mtimes = tuple(mtime for mtime, _ in entries)
+
+        cached = self._cached(self._ranges, (start_year, end_year), mtimes)
+        if cached is not None:
+            return mtimes, cached
+
+        frames = [frame for _, frame in entries if frame is not None]
+        if not frames:
+            logger.warning(format_fields(event='no_data', start_year=start_year, end_year=end_year))
+            return mtimes, None
+        data = pd.concat(frames, ignore_index=True)
+        self._store(self._ranges, (start_year, end_year), mtimes, data)
+        return mtimes, data
+
+    def load(self, start_year, end_year):
+        """
+        Return the rows of start_year..end_year as one DataFrame, or None if no year has data.
+
+        The result is shared between callers and must be treated as read-only.
+        """
+        return self._load_range(start_year, end_year)[1]
+
+    def version(self, start_year, end_year):
+        """Return a value that changes whenever a file of start_year..end_year changes."""
+        return tuple(self._entry(year)[0] for year in range(start_year, end_year + 1))
+
+    def search_index(self, start_year, end_year):
+        """
+        Return the SearchIndex over start_year..end_year, built once per version of the data.
+
+        The index records the years of every name, so callers build it once over the
+        full range and pass the selected range to SearchIndex.search instead of
+        building an index per range.
+        """
+        mtimes, data = self._load_range(start_year, end_year)
+        if data is None:
+            return None
+        cached = self._cached(self._indexes, (start_year, end_year), mtimes)
+        if cached is not None:
+            return cached
+        index = SearchIndex.from_data(data)
+        self._store(self._indexes, (start_year, end_year), mtimes, index)
+        return index
+
+
+_datasets = {}
+_datasets_lock = threading.Lock()
+
+
+def get_dataset(directory):
+    """Return the shared YearDataset for a directory, creating it on first use."""
+    with _datasets_lock:
+        if directory not in _datasets:
+            _datasets[directory] = YearDataset(directory)
+        return _datasets[directory]
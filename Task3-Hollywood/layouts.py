@@ -0,0 +1,171 @@
+import math
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+
+# 热启动时 spring 布局的迭代次数（冷启动为 networkx 默认的 50 次）
+warm_iterations = 15
+
+
+def graph_key(G):
+    """Hash of the node and edge sets, independent of insertion order."""
+    digest = hashlib.blake2b(digest_size=16)
+    for node in sorted(map(repr, G.nodes())):
+        digest.update(node.encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(b'\1')
+    for edge in sorted(repr(edge) for edge in G.edges()):
+        digest.update(edge.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def seed_positions(G, known, seed=0):
+    """
+    Build a full initial position dict for G from previously computed positions.
+
+    Nodes without a known position are placed next to a positioned neighbour
+    (or at random if none is known), so the new layout starts close to the old one.
+    """
+    rng = random.Random(seed)
+    pos = {node: known[node] for node in G if node in known}
+    for node in G:
+        if node in pos:
+            continue
+        anchor = next((pos[n] for n in nx.all_neighbors(G, node) if n in pos), None)
+        if anchor is None:
+            pos[node] = [rng.uniform(-1, 1), rng.uniform(-1, 1)]
+        else:
+            pos[node] = [anchor[0] + rng.uniform(-0.05, 0.05), anchor[1] + rng.uniform(-0.05, 0.05)]
+    return pos
+
+
+def tree_layout(G, radial=False):
+    """
+    Deterministic O(n) layered layout for rooted trees (or forests).
+
+    Leaves take consecutive slots in depth-first order and every parent is centred
+    over its first and last child. The depth comes from the `level` node attribute
+    set by build_tree, falling back to the distance from the root. With
+    `radial=True` the slots are mapped to angles and the depth to the radius.
+    """
+    x, depth, children = {}, {}, {}
+    next_slot = 0
+    visited = set()
+    roots = [node for node, degree in G.in_degree() if degree == 0]
+
+    # 先从入度为 0 的根开始，其余未访问的节点（例如环上的节点）各自作为根
+    for root in roots + list(G):
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, 0, False)]
+        while stack:
+            node, distance, expanded = stack.pop()
+            if expanded:
+                # 后序处理：叶子占下一个槽位，父节点居中于首尾子节点之间
+                kids = children[node]
+                if kids:
+                    x[node] = (x[kids[0]] + x[kids[-1]]) / 2
+                else:
+                    x[node] = next_slot
+                    next_slot += 1
+                continue
+            depth[node] = G.nodes[node].get('level', distance)
+            kids = [child for child in G.successors(node) if child not in visited]
+            visited.update(kids)
+            children[node] = kids
+            stack.append((node, distance, True))
+            stack.extend((child, distance + 1, False) for child in reversed(kids))
+
+    if not radial:
+        return {node: (x[node], -depth[node]) for node in G}
+    slots = max(next_slot, 1)
+    return {
+        node: (depth[node] * math.cos(2 * math.pi * x[node] / slots),
+               depth[node] * math.sin(2 * math.pi * x[node] / slots))
+        for node in G
+    }
+
+
+def compute_layout(G, layout, initial=None):
+    """Compute node positions; spring and kamada_kawai start from `initial` when given."""
+    if layout == 'tree':
+        return tree_layout(G)
+    if layout == 'radial':
+        return tree_layout(G, radial=True)
+    if layout == 'circular':
+        return nx.circular_layout(G)
+    if layout == 'shell':
+        return nx.shell_layout(G)
+    if layout == 'kamada_kawai':
+        return nx.kamada_kawai_layout(G, pos=seed_positions(G, initial) if initial else None)
+    if initial:
+        # 所有节点都有旧位置时只需少量迭代即可收敛
+        iterations = warm_iterations if all(node in initial for node in G) else 50
+        return nx.spring_layout(G, pos=seed_positions(G, initial), iterations=iterations, seed=0)
+    return nx.spring_layout(G, seed=0)
+
+
+class LayoutCache:
+    """
+    Cache of layouts keyed by layout type and either the inputs the graph was
+    built from (when the caller passes `key`) or a hash of the graph structure.
+
+    Repeated views return the cached positions. A changed graph is laid out
+    starting from the latest known position of each node for that layout type,
+    which converges faster and keeps the picture stable between views.
+
+    With a diskcache.Cache as `store` every computed layout is also written there,
+    so short-lived processes (background callback jobs) reuse the layouts and warm
+    starts of earlier jobs instead of starting cold.
+    """
+
+    def __init__(self, max_entries=64, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self._layouts = OrderedDict()  # (layout, graph key) -> positions
+        self._known = {}  # layout -> {node: position}，各节点最近一次的位置
+        self._lock = threading.Lock()
+
+    def _remember(self, key, pos):
+        with self._lock:
+            self._layouts[key] = pos
+            if len(self._layouts) > self.max_entries:
+                self._layouts.popitem(last=False)
+            self._known.setdefault(key[0], {}).update(pos)
+
+    def layout(self, G, layout, key=None):
+        # 调用方给出 key 时不必在每次请求时对整个图求哈希
+        key = (layout, graph_key(G) if key is None else key)
+        with self._lock:
+            if key in self._layouts:
+                self._layouts.move_to_end(key)
+                return self._layouts[key]
+            known = self._known.get(layout)
+
+        if self.store is not None:
+            pos = self.store.get(('layout',) + key)
+            if pos is not None:
+                self._remember(key, pos)
+                return pos
+            if not known:
+                # 本进程还没有算过这种布局（例如新的后台任务），从共享缓存中最近一次的布局热启动
+                latest = self.store.get(('latest_layout', layout))
+                known = self.store.get(latest) if latest is not None else None
+
+        # 布局计算不持锁，避免阻塞其他请求
+        initial = {node: known[node] for node in G if node in known} if known else None
+        pos = compute_layout(G, layout, initial)
+
+        self._remember(key, pos)
+        if self.store is not None:
+            self.store.set(('layout',) + key, pos)
+            self.store.set(('latest_layout', layout), ('layout',) + key)
+        return pos
+
+
+layout_cache = LayoutCache()
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import time
+import random
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# update_tree 回调对应的请求体模板，与 main.py 中的 Output / Input 一致
+callback_outputs = {'id': 'tree-graph', 'property': 'figure'}
+callback_inputs = [('year-range', 'value'), ('tree-type', 'value'), ('layout-type', 'value'),
+                   ('search-dropdown', 'value'), ('expanded-groups', 'data')]
+
+
+def callback_payload(year_range, tree_type, layout_type, search_value=None, expanded=()):
+    values = [list(year_range), tree_type, layout_type, search_value, list(expanded)]
+    return {
+        'output': 'tree-graph.figure',
+        'outputs': callback_outputs,
+        'inputs': [{'id': component, 'property': prop, 'value': value}
+                   for (component, prop), value in zip(callback_inputs, values)],
+        'changedPropIds': ['year-range.value'],
+        'state': []
+    }
+
+
+def random_payloads(count, year_min, year_max, layout_types, seed=0):
+    """Random year ranges, tree and layout types, like analysts moving the controls."""
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        start = rng.randint(year_min, year_max)
+        end = rng.randint(start, year_max)
+        payloads.append(callback_payload((start, end), rng.choice(['genre', 'studio']), rng.choice(layout_types)))
+    return payloads
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def start_server(workers, port, data_directory):
+    """Start gunicorn with the data preloaded in the master, and wait until it answers."""
+    env = dict(os.environ, HOLLYWOOD_BACKGROUND='0')
+    if data_directory:
+        env['HOLLYWOOD_DATA_DIR'] = data_directory
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--preload', '-w', str(workers),
+         '-b', f'127.0.0.1:{port}', 'main:server'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/').read()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("gunicorn exited before accepting requests")
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start in time")
+
+
+def run_load(url, payloads, clients):
+    """Send all payloads with `clients` concurrent clients; return (requests/sec, p50, p95) in seconds."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = sorted(pool.map(lambda payload: post(url, payload), payloads))
+    elapsed = time.perf_counter() - start
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return len(latencies) / elapsed, p50, p95
+
+
+def load_test(worker_counts, clients, requests_per_run, data_directory=None,
+              year_min=2007, year_max=2011, layout_types=('tree', 'spring'), port=8050):
+    """For each worker count start a fresh server, warm it up and measure the update_tree endpoint."""
+    url = f'http://127.0.0.1:{port}/_dash-update-component'
+    payloads = random_payloads(requests_per_run, year_min, year_max, list(layout_types))
+    results = []
+    for workers in worker_counts:
+        process = start_server(workers, port, data_directory)
+        try:
+            # 预热：让每个工作进程都处理过几次请求
+            run_load(url, payloads[:workers * 4], clients)
+            results.append((workers,) + run_load(url, payloads, clients))
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+
+if __name__ == '__main__':
+    # 需要安装 gunicorn（仅支持 Linux / macOS）；数据目录默认使用 main.py 中的设置
+    data_directory = os.environ.get('HOLLYWOOD_DATA_DIR')
+    worker_counts = [1, 2, 4, 8]
+    clients = 16
+    requests_per_run = 400
+
+    results = load_test(worker_counts, clients, requests_per_run, data_directory)
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for workers, rate, p50, p95 in results:
+        print(f"{workers:>8}{rate:>10.1f}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}")
@@ -1,193 +1,94 @@
-import pandas as pd
+import gc
 import os
-import networkx as nx
+import time
+import flask
 from dash import Dash, dcc, html
-from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import plotly.graph_objs as go
 
+from dataset import get_dataset
+from layouts import layout_cache
+from metrics import Trace, metrics, logger, configure_logging, format_fields
+# 树的构建与绘制不依赖 Dash 应用，放在 trees.py 中，基准测试可以直接导入而不触发预加载等副作用
+from trees import (load_data, build_genre_tree, build_studio_tree, tree_builders, node_marker, tree_figure_layout,
+                   node_hover_text, webgl_threshold, visualize_tree, filter_graph)
+
+# 数据集目录，可通过环境变量 HOLLYWOOD_DATA_DIR 指定（例如部署到服务器时）
+data_directory = os.environ.get(
+    'HOLLYWOOD_DATA_DIR',
+    "D:\\My document\\大学\\大三下\\数据可视化\\24Spring-DataVisualization\\Task3-Hollywood\\好莱坞电影数据集\\Hollywood Movie Dataset"
+)
+# 年份滑块的范围
+year_min = 2007
+year_max = 2011
+# 为 True 时把电影表和节点位置一次性发送到浏览器，年份、树类型和搜索的筛选都在浏览器端完成；
+# 可通过环境变量 HOLLYWOOD_CLIENT_SIDE=1 开启
+client_side_mode = os.environ.get('HOLLYWOOD_CLIENT_SIDE', '0') == '1'
+# 细节层次：分组内电影超过该数量时折叠为一个汇总节点，每次点击多展开这么多部电影（仅服务器端模式）。
+# 默认关闭、显示全部电影；可通过环境变量 HOLLYWOOD_LOD_MAX_FILMS 开启，例如 100
+lod_max_films = int(os.environ['HOLLYWOOD_LOD_MAX_FILMS']) if os.environ.get('HOLLYWOOD_LOD_MAX_FILMS') else None
+# 日志级别（DEBUG 时记录每个阶段的耗时）和页面内调试面板的开关
+log_level = os.environ.get('HOLLYWOOD_LOG_LEVEL', 'INFO').upper()
+debug_panel = os.environ.get('HOLLYWOOD_DEBUG_PANEL', '0') == '1'
+# 为 True 时 update_tree 作为后台回调执行（需要 dash[diskcache]），新的交互会终止仍在运行的旧任务。
+# DiskcacheManager 为每个任务启动一个新进程，布局因此同时保存在共享的磁盘缓存中，任务之间可以复用并热启动；
+# 任务进程由服务器进程 fork 而来，继承已预加载的数据。Windows 只能 spawn，每个任务都要重新导入 main 并预加载数据，
+# 因此在 Windows 上默认关闭，可设置 HOLLYWOOD_BACKGROUND=1 开启；其他系统可设置为 0 关闭
+background_mode = os.environ.get('HOLLYWOOD_BACKGROUND', '0' if os.name == 'nt' else '1') == '1'
+
+configure_logging(log_level)
+
+background_manager = None
+try:
+    import diskcache
+    # 各进程（gunicorn 工作进程、后台回调任务）共用的磁盘缓存，保存后台任务的结果；运行指标单独存放，读取时不必遍历任务结果
+    shared_cache = diskcache.Cache(os.path.join(os.path.dirname(__file__), 'cache'))
+    metrics_cache = diskcache.Cache(os.path.join(os.path.dirname(__file__), 'cache', 'metrics'))
+except ImportError:
+    shared_cache = None
+    logger.warning(format_fields(event='missing_dependency', package='diskcache',
+                                 effect='update_tree runs in the request thread, metrics are per process'))
+if shared_cache is not None:
+    metrics.store = metrics_cache
+    layout_cache.store = shared_cache
+    # 启动时清空上一次运行留下的指标。只在最先导入 main 的进程中清空（gunicorn --preload 的主进程），
+    # 之后派生或 spawn 出的进程（工作进程、后台任务）继承环境变量，不会清掉正在运行的实例的指标
+    if os.environ.get('HOLLYWOOD_METRICS_RESET') != '1':
+        metrics.reset()
+        os.environ['HOLLYWOOD_METRICS_RESET'] = '1'
+    if background_mode and not client_side_mode:
+        from dash import DiskcacheManager
+        background_manager = DiskcacheManager(shared_cache)
 
-# 读取数据
-def load_data(directory, start_year, end_year):
-    all_data = []
-    for year in range(start_year, end_year + 1):
-        file_path = os.path.join(directory, f"{year}_data.json")
-        print(f"Checking file: {file_path}")  # 检查文件路径
-        if os.path.exists(file_path):
-            try:
-                yearly_data = pd.read_json(file_path, lines=True)
-                yearly_data['Year'] = year
-                print(f"Loaded data for {year}: {yearly_data.shape[0]} rows")  # 打印每年加载的数据行数
-                all_data.append(yearly_data)
-            except ValueError as e:
-                print(f"Error reading {file_path}: {e}")
-        else:
-            print(f"File not found: {file_path}")
-
-    if all_data:
-        data = pd.concat(all_data, ignore_index=True)
-        data.columns = data.columns.str.strip().str.replace(" ", "_").str.lower()
-        print("Columns in loaded data:", data.columns.tolist())  # 打印列名
-        print(f"Total loaded data: {data.shape[0]} rows")  # 打印总的数据行数
-        return data
-    else:
-        print("No data loaded.")
-        return None  # 如果没有数据，返回 None
+# 创建Dash应用
+app = Dash(__name__)
+# WSGI 入口，例如 gunicorn --preload -w 4 main:server
+server = app.server
 
 
-# 构建电影类型树
-# 在构建树的函数中添加电影的详细信息为节点属性
-def build_genre_tree(data):
-    if data is None:
-        raise ValueError("Input data is None.")
-
-    G = nx.DiGraph()
-    root = "Movies by Genre"
-    G.add_node(root, level=0)
-
-    # 删除或填充 genre 列中的 NaN 值
-    data = data.dropna(subset=['genre'])  # 删除缺失 'genre' 的行
-
-    for genre in data['genre'].unique():
-        if genre is not None:  # 确保 genre 不是 None
-            G.add_node(genre, level=1)
-            G.add_edge(root, genre)
-            genre_movies = data[data['genre'] == genre]
-            for index, movie in genre_movies.iterrows():
-                movie_node = movie['film']
-                if pd.notnull(movie_node):  # 确保电影名称不是 None
-                    G.add_node(movie_node,
-                               level=2,
-                               genre=movie['genre'],
-                               rotten_tomatoes=movie['rotten_tomatoes'] if pd.notnull(
-                                   movie['rotten_tomatoes']) else 'N/A',
-                               audience_score=movie['audience_score'] if pd.notnull(movie['audience_score']) else 'N/A',
-                               domestic_gross=movie['domestic_gross'] if pd.notnull(movie['domestic_gross']) else 0,
-                               foreign_gross=movie['foreign_gross'] if pd.notnull(movie['foreign_gross']) else 0,
-                               worldwide_gross=movie['worldwide_gross'] if pd.notnull(movie['worldwide_gross']) else 0,
-                               budget=movie['budget'] if pd.notnull(movie['budget']) else 0,
-                               oscar=movie['oscar'] if pd.notnull(movie['oscar']) else 'N/A',
-                               bafta=movie['bafta'] if pd.notnull(movie['bafta']) else 'N/A')
-                    G.add_edge(genre, movie_node)
-    return G
-
-
-# 构建电影公司树
-def build_studio_tree(data):
-    G = nx.DiGraph()
-    root = "Movies by Studio"
-    G.add_node(root, level=0)
-
-    # 删除或填充 major_studio 列中的 NaN 值
-    # data = data.dropna(subset=['major_studio'])  # 删除缺失 'major_studio' 的行
-
-    for studio in data['major_studio'].unique():
-        if studio is not None:  # 确保 studio 不是 None
-            G.add_node(studio, level=1)
-            G.add_edge(root, studio)
-            studio_movies = data[data['major_studio'] == studio]
-            for index, movie in studio_movies.iterrows():
-                movie_node = movie['film']
-                if pd.notnull(movie_node):  # 确保电影名称不是 None
-                    G.add_node(movie_node,
-                               level=2,
-                               genre=movie['genre'],
-                               rotten_tomatoes=movie['rotten_tomatoes'] if pd.notnull(
-                                   movie['rotten_tomatoes']) else 'N/A',
-                               audience_score=movie['audience_score'] if pd.notnull(movie['audience_score']) else 'N/A',
-                               domestic_gross=movie['domestic_gross'] if pd.notnull(movie['domestic_gross']) else 0,
-                               foreign_gross=movie['foreign_gross'] if pd.notnull(movie['foreign_gross']) else 0,
-                               worldwide_gross=movie['worldwide_gross'] if pd.notnull(movie['worldwide_gross']) else 0,
-                               budget=movie['budget'] if pd.notnull(movie['budget']) else 0,
-                               oscar=movie['oscar'] if pd.notnull(movie['oscar']) else 'N/A',
-                               bafta=movie['bafta'] if pd.notnull(movie['bafta']) else 'N/A')
-                    G.add_edge(studio, movie_node)
-    return G
-
-
-# 可视化树
-def visualize_tree(G, layout='spring'):
-    if layout == 'circular':
-        pos = nx.circular_layout(G)
-    elif layout == 'shell':
-        pos = nx.shell_layout(G)
-    elif layout == 'kamada_kawai':
-        pos = nx.kamada_kawai_layout(G)
-    else:
-        pos = nx.spring_layout(G)
-
-    edge_x = []
-    edge_y = []
-
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.append(x0)
-        edge_x.append(x1)
-        edge_x.append(None)
-        edge_y.append(y0)
-        edge_y.append(y1)
-        edge_y.append(None)
-
-    edge_trace = go.Scatter(
-        x=edge_x, y=edge_y,
-        line=dict(width=1.5, color='#888'),
-        hoverinfo='none',
-        mode='lines')
-
-    node_x = []
-    node_y = []
-    node_color = []
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_color.append(G.nodes[node]['level'])  # 根据节点的层级设置颜色
-
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
-        mode='markers',
-        hoverinfo='text',
-        text=[
-            f"{node}<br>Genre: {G.nodes[node].get('genre', 'N/A')}<br>Rating: Rotten Tomatoes {G.nodes[node].get('rotten_tomatoes', 'N/A')}%, Audience {G.nodes[node].get('audience_score', 'N/A')}%"
-            f"<br>Domestic Gross: ${float(G.nodes[node].get('domestic_gross', 0)):,.0f}m<br>Foreign Gross: ${float(G.nodes[node].get('foreign_gross', 0)):,.0f}m<br>Worldwide Gross: ${float(G.nodes[node].get('worldwide_gross', 0)):,.0f}m"
-            f"<br>Budget: ${float(G.nodes[node].get('budget', 0)):,.0f}m<br>Oscar: {G.nodes[node].get('oscar', 'N/A')}<br>Bafta: {G.nodes[node].get('bafta', 'N/A')}"
-            for node in G.nodes()],
-        marker=dict(
-            showscale=True,
-            colorscale='YlGnBu',
-            size=12,
-            color=node_color,
-            colorbar=dict(
-                thickness=15,
-                title='Node Levels',
-                xanchor='left',
-                titleside='right'
-            ),
-            line_width=2)
-    )
+# 指标接口：Prometheus 文本格式，?format=json 时返回 JSON
+@server.route('/metrics')
+def metrics_endpoint():
+    if flask.request.args.get('format') == 'json':
+        return flask.jsonify(metrics.snapshot())
+    return flask.Response(metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
 
-    fig = go.Figure(data=[edge_trace, node_trace],
-                    layout=go.Layout(
-                        title='Tree Visualization',
-                        showlegend=False,
-                        hovermode='closest',
-                        margin=dict(b=0, l=0, r=0, t=40),
-                        annotations=[dict(
-                            text="Tree Visualization",
-                            showarrow=False,
-                            xref="paper", yref="paper",
-                            x=0.005, y=-0.002)],
-                        xaxis=dict(showgrid=False, zeroline=False),
-                        yaxis=dict(showgrid=False, zeroline=False),
-                        width=1200,  # 调整宽度
-                        height=800  # 调整高度
-                    )
-                    )
-    return fig
 
+@server.before_request
+def start_request_timer():
+    flask.g.request_start = time.perf_counter()
 
-# 创建Dash应用
-app = Dash(__name__)
+
+# 同步执行的 update_tree 返回后由 Dash 序列化图表，序列化耗时为整个请求减去回调本身的耗时
+@server.after_request
+def record_payload(response):
+    callback_seconds = flask.g.get('callback_seconds')
+    if callback_seconds is not None and not response.direct_passthrough:
+        metrics.observe('serialize', time.perf_counter() - flask.g.request_start - callback_seconds)
+        metrics.gauge('payload_bytes', response.content_length or 0)
+        logger.debug(format_fields(event='response', payload_bytes=response.content_length or 0))
+    return response
 
 # 添加CSS样式
 app.css.append_css({
@@ -200,15 +101,15 @@ app.layout = html.Div([
         html.Div([
             dcc.RangeSlider(
                 id='year-range',
-                min=2007,
-                max=2011,
+                min=year_min,
+                max=year_max,
                 step=1,
-                marks={i: str(i) for i in range(2007, 2012)},
-                value=[2007, 2011]
+                marks={i: str(i) for i in range(year_min, year_max + 1)},
+                value=[year_min, year_max]
             )
         ], style={'width': '100%', 'padding': '20px'}),
         html.Div([
-            dcc.Dropdown(id='search-dropdown', placeholder='Select a movie or studio...'),
+            dcc.Dropdown(id='search-dropdown', placeholder='Search a genre, studio or movie...'),
         ], style={'width': '100%', 'padding': '20px'}),
         html.Div([
             dcc.RadioItems(
@@ -229,85 +130,243 @@ app.layout = html.Div([
                 {'label': 'Spring Layout', 'value': 'spring'},
                 {'label': 'Circular Layout', 'value': 'circular'},
                 {'label': 'Shell Layout', 'value': 'shell'},
-                {'label': 'Kamada-Kawai Layout', 'value': 'kamada_kawai'}
+                {'label': 'Kamada-Kawai Layout', 'value': 'kamada_kawai'},
+                {'label': 'Tree Layout', 'value': 'tree'},
+                {'label': 'Radial Tree Layout', 'value': 'radial'}
             ],
             value='spring',
             style={'width': '100%', 'textAlign': 'center', 'padding': '10px'}
         )
     ], style={'textAlign': 'center'}),
+    # 后台回调执行时显示当前阶段；放在 dcc.Loading 外面，加载期间 Loading 会隐藏其子组件
+    html.Div(id='tree-progress', style={'display': 'none'}),
     dcc.Loading(
         id="loading",
         type="circle",
         children=dcc.Graph(id='tree-graph')
-    )
+    ),
+    # 浏览器端筛选模式下保存完整的树
+    dcc.Store(id='tree-store'),
+    # 已展开的分组
+    dcc.Store(id='expanded-groups', data=[])
 ], style={'margin': '20px'})
 
+if debug_panel:
+    # 调试面板：定期显示各阶段的耗时和最近一次请求的节点数、边数、响应大小
+    app.layout.children.extend([
+        html.Pre(id='debug-panel', style={'fontSize': '12px', 'background': '#f7f7f7', 'padding': '10px'}),
+        dcc.Interval(id='debug-interval', interval=2000)
+    ])
 
-def filter_graph(G, search_value):
-    """
-    Filter the graph to show only the nodes that match the search value and their direct connections.
-    """
-    # 将搜索值转化为小写以进行不区分大小写的匹配
-    search_value = search_value.lower()
-    filtered_graph = nx.DiGraph()
-    for node in G.nodes(data=True):
-        # 确保节点名称是字符串类型
-        node_name = str(node[0]).lower()
-        if search_value in node_name:
-            # 添加当前节点
-            filtered_graph.add_node(node[0], **node[1])
-            # 添加与当前节点相连的所有边和节点
-            for edge in G.edges(node[0], data=True):
-                filtered_graph.add_edge(edge[0], edge[1], **edge[2])
-                filtered_graph.add_node(edge[1], **G.nodes[edge[1]])
-
-    return filtered_graph
 
+# 搜索索引覆盖滑块的全部年份，只构建一次；拖动滑块时按所选年份筛选结果，不重建索引
+def full_search_index():
+    return get_dataset(data_directory).search_index(year_min, year_max)
 
-@app.callback(
-    Output('search-dropdown', 'options'),
-    [Input('tree-type', 'value'),
-     Input('year-range', 'value')]
-)
-def update_search_options(tree_type, year_range):
-    directory = "D:\\My document\\大学\\大三下\\数据可视化\\24Spring-DataVisualization\\Task3-Hollywood\\好莱坞电影数据集\\Hollywood Movie Dataset"
-    data = load_data(directory, year_range[0], year_range[1])
-    if data is not None:
-        if tree_type == 'genre':
-            options = [{'label': genre, 'value': genre} for genre in data['genre'].dropna().unique()]
-        else:
-            options = [{'label': studio, 'value': studio} for studio in data['major_studio'].dropna().unique()]
-        return options
-    return []
 
+# 下拉框输入时最多返回的候选项数量
+search_limit = 20
 
 
 @app.callback(
-    Output('tree-graph', 'figure'),
-    [Input('year-range', 'value'),
+    Output('search-dropdown', 'options'),
+    [Input('search-dropdown', 'search_value'),
      Input('tree-type', 'value'),
-     Input('layout-type', 'value'),
-     Input('search-dropdown', 'value')]
+     Input('year-range', 'value')],
+    State('search-dropdown', 'value')
 )
-def update_tree(year_range, tree_type, layout_type, search_value):
-    directory = "D:\\My document\\大学\\大三下\\数据可视化\\24Spring-DataVisualization\\Task3-Hollywood\\好莱坞电影数据集\\Hollywood Movie Dataset"
-    data = load_data(directory, year_range[0], year_range[1])
-    print(data)
+def update_search_options(search_text, tree_type, year_range, value):
+    index = full_search_index()
+    if index is None:
+        return []
+
+    group_kind = 'genre' if tree_type == 'genre' else 'studio'
+    if search_text:
+        # 在服务器端检索，只把最匹配的少量候选项发送给浏览器
+        matches = index.search(search_text, kinds={group_kind, 'film'}, limit=search_limit, year_range=year_range)
+    else:
+        # 未输入时只列出类型或公司，数量很少
+        matches = [(name, group_kind) for name in index.names_of_kind(group_kind, year_range)]
+    options = [{'label': f"{name} (film)" if kind == 'film' else name, 'value': name} for name, kind in matches]
+
+    # 保留当前选中的值，否则下拉框会被清空
+    if value and value not in {option['value'] for option in options}:
+        options.append({'label': value, 'value': value})
+    return options
+
+
+def update_tree(year_range, tree_type, layout_type, search_value, expanded=None, report=None):
+    # report 为后台回调的进度函数，同步执行时为 None
+    report = report or (lambda stage: None)
+    trace = Trace('update_tree')
+    report("Loading data...")
+    with trace.span('load_data'):
+        data = load_data(data_directory, year_range[0], year_range[1])
 
     if data is None:
-        print("No data available for the selected range.")
+        logger.warning(format_fields(event='no_data', start_year=year_range[0], end_year=year_range[1]))
         return go.Figure()  # 返回一个空图表
 
-    if tree_type == 'genre':
-        tree = build_genre_tree(data)
-    else:
-        tree = build_studio_tree(data)
+    report("Building tree...")
+    # 搜索时需要完整的树才能找到被折叠的电影，此时不折叠
+    options = {} if search_value or lod_max_films is None else {'max_films': lod_max_films, 'expanded': expanded or []}
+    with trace.span('build_tree'):
+        if tree_type == 'genre':
+            tree = build_genre_tree(data, **options)
+        else:
+            tree = build_studio_tree(data, **options)
+
+        # 如果有搜索值，过滤图以仅显示相关节点
+        if search_value:
+            # 全范围索引中不在本年份范围内的名称会被 filter_graph 按 name in G 排除
+            tree = filter_graph(tree, search_value, full_search_index())
+    trace.record(rows=len(data), nodes=tree.number_of_nodes(), edges=tree.number_of_edges())
+
+    report(f"Computing {layout_type} layout for {tree.number_of_nodes()} nodes...")
+    # 树完全由这些输入决定：数据文件版本、年份范围、树类型、搜索值和展开的分组
+    key = (get_dataset(data_directory).version(year_range[0], year_range[1]), tuple(year_range), tree_type,
+           search_value, lod_max_films, tuple(sorted(expanded or [])))
+    figure = visualize_tree(tree, layout=layout_type, trace=trace, key=key)
+    seconds = trace.finish()
+    if flask.has_request_context():
+        flask.g.callback_seconds = seconds
+    return figure
+
+
+# 点击汇总节点时多展开其分组的一页电影，点击已展开的分组时重新折叠
+def toggle_group(click_data, expanded):
+    points = (click_data or {}).get('points') or [{}]
+    customdata = points[0].get('customdata')
+    if not customdata:
+        raise PreventUpdate
+    group, action = customdata
+    expanded = list(expanded or [])
+    if action == 'collapse':
+        return [name for name in expanded if name != group]
+    return expanded + [group]
+
+
+# 后台回调的入口：Dash 把进度函数作为第一个参数传入
+def update_tree_in_background(set_progress, year_range, tree_type, layout_type, search_value, expanded):
+    figure = update_tree(year_range, tree_type, layout_type, search_value, expanded, report=set_progress)
+    # 任务结果由 Dash 在任务进程中序列化后写入缓存，请求钩子看不到，因此在这里测量序列化耗时和图表大小
+    start = time.perf_counter()
+    payload_bytes = len(figure.to_json())
+    metrics.observe('serialize', time.perf_counter() - start)
+    metrics.gauge('payload_bytes', payload_bytes)
+    # 任务进程随后退出，指标要立即写入共享缓存
+    metrics.flush()
+    set_progress("")
+    return figure
+
+
+# 为浏览器端筛选准备数据：覆盖全部年份的两种树，按列保存节点名称、位置、层级、年份、上级节点和悬停文字
+def build_client_store(layout_type):
+    data = load_data(data_directory, year_min, year_max)
+    store = {
+        'layout': tree_figure_layout().to_plotly_json(),
+        'marker': go.scatter.Marker(**node_marker()).to_plotly_json(),
+        'webgl_threshold': webgl_threshold
+    }
+    if data is None:
+        return store
+
+    for tree_type, build in tree_builders.items():
+        G = build(data)
+        pos = layout_cache.layout(G, layout_type)
+        nodes = list(G.nodes())
+        position = {node: i for i, node in enumerate(nodes)}
+        store[tree_type] = {
+            'name': [str(node) for node in nodes],
+            'x': [float(pos[node][0]) for node in nodes],
+            'y': [float(pos[node][1]) for node in nodes],
+            'level': [G.nodes[node]['level'] for node in nodes],
+            'year': [G.nodes[node].get('year') for node in nodes],
+            'parent': [position[next(G.predecessors(node))] if G.in_degree(node) else -1 for node in nodes],
+            'hover': [node_hover_text(node, G.nodes[node]) for node in nodes]
+        }
+    return store
+
+
+if client_side_mode:
+    # 只有布局类型变化时才访问服务器，其余交互由 assets/tree_filter.js 在浏览器中完成
+    app.callback(
+        Output('tree-store', 'data'),
+        Input('layout-type', 'value')
+    )(build_client_store)
+    app.clientside_callback(
+        ClientsideFunction(namespace='tree', function_name='filter_tree'),
+        Output('tree-graph', 'figure'),
+        [Input('tree-store', 'data'),
+         Input('year-range', 'value'),
+         Input('tree-type', 'value'),
+         Input('search-dropdown', 'value')]
+    )
+elif background_manager is not None:
+    # 任务在工作进程中执行；同一回调的新请求到达时，浏览器会把旧任务的编号一并发送，服务器随即终止旧任务
+    app.callback(
+        Output('tree-graph', 'figure'),
+        [Input('year-range', 'value'),
+         Input('tree-type', 'value'),
+         Input('layout-type', 'value'),
+         Input('search-dropdown', 'value'),
+         Input('expanded-groups', 'data')],
+        background=True,
+        manager=background_manager,
+        progress=Output('tree-progress', 'children'),
+        running=[(Output('tree-progress', 'style'),
+                  {'textAlign': 'center', 'color': '#888'},
+                  {'display': 'none'})]
+    )(update_tree_in_background)
+else:
+    app.callback(
+        Output('tree-graph', 'figure'),
+        [Input('year-range', 'value'),
+         Input('tree-type', 'value'),
+         Input('layout-type', 'value'),
+         Input('search-dropdown', 'value'),
+         Input('expanded-groups', 'data')]
+    )(update_tree)
+
+if not client_side_mode and lod_max_films is not None:
+    app.callback(
+        Output('expanded-groups', 'data'),
+        Input('tree-graph', 'clickData'),
+        State('expanded-groups', 'data')
+    )(toggle_group)
+
+
+def preload_data():
+    """
+    Load every year and build the full-range search index in this process.
+
+    Runs at import time, so with `gunicorn --preload` (and for background
+    callback jobs forked on Linux) the workers inherit the parsed data
+    copy-on-write instead of each re-reading the files.
+    """
+    if not os.path.isdir(data_directory):
+        logger.error(format_fields(event='data_directory_missing', path=data_directory))
+        return
+    dataset = get_dataset(data_directory)
+    dataset.load(year_min, year_max)
+    full_search_index()
+    # 预加载的对象不再参与垃圾回收扫描，避免回收器改写引用计数所在的页面而破坏写时复制
+    gc.freeze()
+
+
+preload_data()
+
+
+# 调试面板的内容
+def render_debug_panel(n_intervals):
+    return metrics.format_table()
 
-    # 如果有搜索值，过滤图以仅显示相关节点
-    if search_value:
-        tree = filter_graph(tree, search_value)
 
-    return visualize_tree(tree, layout=layout_type)
+if debug_panel:
+    app.callback(
+        Output('debug-panel', 'children'),
+        Input('debug-interval', 'n_intervals')
+    )(render_debug_panel)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pandas as pd
+
+import Preprocess
+from Preprocess import apply_schema, output_path
+
+genres = ['Comedy', 'Drama', 'Action', 'Romance', 'Animation', 'Thriller', 'Adventure',
+          'Fantasy', 'Horror', 'Documentary', 'Musical', 'Science Fiction']
+major_studios = ['Warner Bros.', 'Universal', 'Disney', 'Sony', 'Paramount', 'Fox',
+                 'Lionsgate', 'Summit', 'Weinstein', 'Independent']
+title_words = ['Last', 'Night', 'Dark', 'Love', 'City', 'Return', 'Secret', 'Lost', 'King', 'Star',
+               'Road', 'House', 'Day', 'War', 'Blue', 'Summer', 'Storm', 'Fire', 'Dream', 'Game']
+
+
+# 长尾分布的权重：排名越靠前的取值越常见
+def zipf_weights(count, exponent=1.1):
+    weights = 1 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+# 生成某一年的电影表，列与 Preprocess.py 的输出一致
+def synthetic_year(year, films, studios=200, seed=0):
+    rng = np.random.default_rng(seed + year)
+    studio_names = np.array(major_studios + [f"Studio {i}" for i in range(len(major_studios), studios)])
+    words = np.array(title_words)
+    titles = pd.Series(words[rng.integers(len(words), size=films)]) + ' ' + pd.Series(words[rng.integers(len(words), size=films)])
+    # 序号保证同一年内和不同年份之间的片名都不重复
+    titles = titles + f' {year}-' + pd.Series(np.arange(films)).astype(str)
+
+    budget = np.round(rng.lognormal(3.3, 0.9, size=films), 1)
+    domestic = np.round(budget * rng.lognormal(0.1, 0.8, size=films), 2)
+    foreign = np.round(budget * rng.lognormal(0.0, 0.9, size=films), 2)
+    data = pd.DataFrame({
+        'film': titles,
+        'genre': rng.choice(genres, size=films, p=zipf_weights(len(genres))),
+        'major_studio': rng.choice(studio_names, size=films, p=zipf_weights(len(studio_names))),
+        'rotten_tomatoes': rng.integers(0, 101, size=films).astype(float),
+        'audience_score': rng.integers(20, 101, size=films).astype(float),
+        'domestic_gross': domestic,
+        'foreign_gross': foreign,
+        'worldwide_gross': domestic + foreign,
+        'budget': budget,
+        'oscar': np.where(rng.random(films) < 0.03, 'Yes', 'No'),
+        'bafta': np.where(rng.random(films) < 0.03, 'Yes', 'No'),
+    })
+    # 与真实数据一样有少量缺失值
+    for column in ['rotten_tomatoes', 'audience_score', 'budget']:
+        data.loc[rng.random(films) < 0.05, column] = np.nan
+    return data
+
+
+# 把 start_year..end_year 共 total_films 部电影平均分到各年份，写出与 Preprocess.py 相同格式的文件
+def write_movies(directory, start_year, end_year, total_films, studios=200, seed=0):
+    years = range(start_year, end_year + 1)
+    per_year = max(total_films // len(years), 1)
+    os.makedirs(directory, exist_ok=True)
+    for year in years:
+        yearly_data = apply_schema(synthetic_year(year, per_year, studios, seed))
+        output = output_path(directory, year)
+        if Preprocess.pa is None:
+            Preprocess.save_data_to_json(yearly_data, output)
+        else:
+            Preprocess.save_data_to_parquet(yearly_data, output)
+    return per_year * len(years)
+
+
+if __name__ == "__main__":
+    # 输出目录、年份范围与电影总数
+    directory = "synthetic"
+    start_year = 1990
+    end_year = 2019
+    total_films = 300000
+
+    count = write_movies(directory, start_year, end_year, total_films)
+    print(f"Wrote {count} films for {start_year}-{end_year} to {directory}")
@@ -0,0 +1,199 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger('hollywood')
+
+
+def configure_logging(level='INFO'):
+    """Write the app's log records to stderr as `key=value` lines, at the given level."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('time=%(asctime)s level=%(levelname)s logger=%(name)s %(message)s'))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def format_fields(**fields):
+    """Render fields as `key=value` pairs; strings containing spaces are quoted."""
+    pairs = []
+    for key, value in fields.items():
+        if isinstance(value, float):
+            value = f"{value:.4f}"
+        elif isinstance(value, str) and (' ' in value or not value):
+            value = f'"{value}"'
+        pairs.append(f"{key}={value}")
+    return ' '.join(pairs)
+
+
+class StageMetrics:
+    """
+    Call counts and durations of the named stages, plus the last value of each gauge.
+
+    Values are aggregated in this process. With a diskcache.Cache as `store` (a
+    cache used for nothing else) the pending changes are written to it in one
+    transaction at most every `flush_seconds`, and on every snapshot, so the values
+    are shared by every process using the same cache directory (gunicorn workers,
+    background callback jobs); without one they live in this process only.
+    Durations are kept in integer microseconds so the shared counters can be
+    updated with atomic increments.
+    """
+
+    def __init__(self, store=None, flush_seconds=5.0):
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self._values = {}
+        self._pending = {}  # 上次写入 store 之后的计数增量
+        self._latest = {}  # 上次写入 store 之后设置的值
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            # fork 出的子进程（工作进程、后台任务）不能再次写入父进程尚未写入的增量
+            os.register_at_fork(after_in_child=self._forget_pending)
+
+    def _forget_pending(self):
+        self._lock = threading.Lock()
+        self._pending, self._latest = {}, {}
+
+    def _add(self, key, delta):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + delta
+            self._pending[key] = self._pending.get(key, 0) + delta
+        self._maybe_flush()
+
+    def _set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._latest[key] = value
+        self._maybe_flush()
+
+    def reset(self):
+        """Forget every value, including those in `store` (e.g. left over from a previous run)."""
+        with self._lock:
+            self._values, self._pending, self._latest = {}, {}, {}
+        if self.store is not None:
+            self.store.clear()
+
+    def _maybe_flush(self):
+        if self.store is not None and time.monotonic() - self._flushed >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write the changes made since the last flush to `store` in one transaction."""
+        with self._lock:
+            pending, latest = self._pending, self._latest
+            self._pending, self._latest = {}, {}
+            self._flushed = time.monotonic()
+        if self.store is None or not (pending or latest):
+            return
+        with self.store.transact():
+            for key, delta in pending.items():
+                self.store.incr(key, delta)
+            for key, value in latest.items():
+                self.store.set(key, value)
+
+    def _items(self):
+        if self.store is None:
+            with self._lock:
+                return list(self._values.items())
+        self.flush()
+        items = []
+        for key in self.store.iterkeys():
+            value = self.store.get(key)
+            if value is not None:
+                items.append((key, value))
+        return items
+
+    def observe(self, stage, seconds):
+        micros = int(seconds * 1e6)
+        self._add(('calls', stage), 1)
+        self._add(('micros', stage), micros)
+        self._set(('last_micros', stage), micros)
+
+    def gauge(self, name, value):
+        self._set(('gauge', name), value)
+
+    def snapshot(self):
+        """{'stages': {stage: {calls, seconds_total, seconds_last}}, 'gauges': {name: value}}"""
+        stages, gauges = {}, {}
+        for (kind, name), value in sorted(self._items()):
+            if kind == 'gauge':
+                gauges[name] = value
+                continue
+            stage = stages.setdefault(name, {'calls': 0, 'seconds_total': 0.0, 'seconds_last': 0.0})
+            if kind == 'calls':
+                stage['calls'] = value
+            elif kind == 'micros':
+                stage['seconds_total'] = value / 1e6
+            elif kind == 'last_micros':
+                stage['seconds_last'] = value / 1e6
+        return {'stages': stages, 'gauges': gauges}
+
+    def prometheus_text(self, prefix='hollywood'):
+        """The snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_stage_calls_total counter",
+                 f"# TYPE {prefix}_stage_seconds_total counter",
+                 f"# TYPE {prefix}_stage_last_seconds gauge"]
+        for stage, values in snapshot['stages'].items():
+            lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {values["calls"]}')
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {values["seconds_total"]:.6f}')
+            lines.append(f'{prefix}_stage_last_seconds{{stage="{stage}"}} {values["seconds_last"]:.6f}')
+        for name, value in snapshot['gauges'].items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def format_table(self):
+        """Plain-text table of the snapshot for the in-page debug panel."""
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<16}{'calls':>8}{'last ms':>12}{'mean ms':>12}"]
+        for stage, values in snapshot['stages'].items():
+            mean = values['seconds_total'] / values['calls'] if values['calls'] else 0.0
+            lines.append(f"{stage:<16}{values['calls']:>8}{values['seconds_last'] * 1000:>12.1f}{mean * 1000:>12.1f}")
+        lines.extend(f"{name:<16}{value:>8}" for name, value in snapshot['gauges'].items())
+        return '\n'.join(lines)
+
+
+metrics = StageMetrics()
+
+
+class Trace:
+    """
+    Timing spans of one request.
+
+    Every span is added to the shared `metrics` when it ends and logged at DEBUG;
+    finish() logs the whole request on one INFO line with its recorded counts.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.fields = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.spans.append((stage, seconds))
+            metrics.observe(stage, seconds)
+            logger.debug(format_fields(event='span', request=self.name, stage=stage, seconds=seconds))
+
+    def record(self, **fields):
+        """Attach counts (nodes, edges, ...) to the request and publish them as gauges."""
+        self.fields.update(fields)
+        for name, value in fields.items():
+            metrics.gauge(name, value)
+
+    def finish(self):
+        seconds = time.perf_counter() - self._start
+        metrics.observe(self.name, seconds)
+        logger.info(format_fields(event='request', request=self.name, seconds=seconds,
+                                  **{stage: elapsed for stage, elapsed in self.spans}, **self.fields))
+        return seconds
@@ -0,0 +1,9 @@
+import os
+
+# Preprocess.py 输出的按年份分区的 Parquet 数据集所在的子目录
+partition_root = 'movies'
+
+
+def partition_path(directory, year):
+    """Path of one year's partition, e.g. movies/year=2007/part-0.parquet."""
+    return os.path.join(directory, partition_root, f"year={year}", "part-0.parquet")
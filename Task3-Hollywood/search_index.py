@@ -0,0 +1,140 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+# 参与搜索的列及其在结果中的类别名
+search_columns = {'genre': 'genre', 'major_studio': 'studio', 'film': 'film'}
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Case-insensitive name index over genres, studios and film titles.
+
+    Word prefixes are kept in a sorted list for bisection, and substrings of three
+    or more characters are answered from a trigram index, so only queries shorter
+    than a trigram fall back to comparing every name.
+
+    Entries may carry the year they occur in, as (name, kind, year); one index
+    over all years then answers searches restricted to any year range.
+    """
+
+    def __init__(self, entries):
+        self.names, self.kinds, self.lower = [], [], []
+        self._year_bits = []  # 每个条目出现过的年份，第 i 位表示 base_year + i
+        entries = list(entries)
+        years = [entry[2] for entry in entries if len(entry) > 2]
+        self.base_year = min(years) if years else 0
+        ids = {}
+        for entry in entries:
+            name, kind = entry[0], entry[1]
+            entry_id = ids.get((name, kind))
+            if entry_id is None:
+                entry_id = ids[(name, kind)] = len(self.names)
+                self.names.append(name)
+                self.kinds.append(kind)
+                self.lower.append(str(name).lower())
+                self._year_bits.append(0)
+            if len(entry) > 2:
+                self._year_bits[entry_id] |= 1 << (int(entry[2]) - self.base_year)
+
+        self._trigrams = defaultdict(set)  # trigram -> 含有该三元组的条目编号
+        word_starts = []  # (从某个单词开头起的后缀, 条目编号)
+        for entry_id, name in enumerate(self.lower):
+            for gram in trigrams(name):
+                self._trigrams[gram].add(entry_id)
+            for match in re.finditer(r'\w+', name):
+                word_starts.append((name[match.start():], entry_id))
+        word_starts.sort()
+        self._by_kind = defaultdict(list)  # kind -> 该类别下的全部条目编号
+        for entry_id, kind in enumerate(self.kinds):
+            self._by_kind[kind].append(entry_id)
+        self._suffixes = [suffix for suffix, _ in word_starts]
+        self._suffix_ids = [entry_id for _, entry_id in word_starts]
+
+    @classmethod
+    def from_data(cls, data):
+        entries = []
+        for column, kind in search_columns.items():
+            if column not in data:
+                continue
+            if 'year' in data:
+                pairs = data[[column, 'year']].dropna().drop_duplicates()
+                entries.extend(zip(pairs[column].tolist(), [kind] * len(pairs), pairs['year'].tolist()))
+            else:
+                entries.extend((name, kind) for name in data[column].dropna().unique())
+        return cls(entries)
+
+    def _in_years(self, entry_ids, year_range):
+        """Keep the entries occurring in year_range (start, end); entries without years always match."""
+        if year_range is None:
+            return entry_ids
+        start = max(year_range[0] - self.base_year, 0)
+        end = year_range[1] - self.base_year
+        if end < start:
+            return {entry_id for entry_id in entry_ids if not self._year_bits[entry_id]}
+        mask = ((1 << (end - start + 1)) - 1) << start
+        return {entry_id for entry_id in entry_ids
+                if not self._year_bits[entry_id] or self._year_bits[entry_id] & mask}
+
+    def names_of_kind(self, kind, year_range=None):
+        """All names of one kind ('genre', 'studio' or 'film') in first-seen order, optionally only those in year_range."""
+        entry_ids = self._by_kind.get(kind, [])
+        if year_range is not None:
+            kept = self._in_years(set(entry_ids), year_range)
+            entry_ids = [entry_id for entry_id in entry_ids if entry_id in kept]
+        return [self.names[entry_id] for entry_id in entry_ids]
+
+    def _prefix_ids(self, query):
+        """Entries with a word starting with query, via bisection on the sorted word suffixes."""
+        ids = []
+        position = bisect_left(self._suffixes, query)
+        while position < len(self._suffixes) and self._suffixes[position].startswith(query):
+            ids.append(self._suffix_ids[position])
+            position += 1
+        return ids
+
+    def _substring_ids(self, query):
+        """Entries whose name contains query anywhere."""
+        if len(query) < 3:
+            # 过短的查询无法使用三元组索引，只能逐个比较
+            return [entry_id for entry_id, name in enumerate(self.lower) if query in name]
+        postings = sorted((self._trigrams.get(gram, set()) for gram in trigrams(query)), key=len)
+        candidates = set.intersection(*postings)
+        # 三元组都出现不代表连续出现，需再确认一次
+        return [entry_id for entry_id in candidates if query in self.lower[entry_id]]
+
+    def search(self, query, kinds=None, limit=20, year_range=None):
+        """
+        Return up to `limit` (name, kind) pairs matching query, best first, optionally
+        only names occurring in year_range.
+
+        Exact matches come first, then names starting with the query, then names with
+        a word starting with it, then (for queries of three or more characters) any
+        other substring match; ties are broken by shorter name.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        word_prefix = set(self._prefix_ids(query))
+        ids = set(word_prefix)
+        if len(query) >= 3:
+            ids.update(self._substring_ids(query))
+        if kinds is not None:
+            ids = {entry_id for entry_id in ids if self.kinds[entry_id] in kinds}
+        ids = self._in_years(ids, year_range)
+
+        def rank(entry_id):
+            name = self.lower[entry_id]
+            return name != query, not name.startswith(query), entry_id not in word_prefix, len(name), name
+
+        best = sorted(ids, key=rank)[:limit]
+        return [(self.names[entry_id], self.kinds[entry_id]) for entry_id in best]
+
+    def matching_names(self, query):
+        """Set of all names containing query, case-insensitively (the filter_graph semantics)."""
+        query = query.lower()
+        return {self.names[entry_id] for entry_id in self._substring_ids(query)}
@@ -0,0 +1,269 @@
+import pandas as pd
+import networkx as nx
+import plotly.graph_objs as go
+
+from dataset import get_dataset, hover_template, money_columns
+from layouts import layout_cache
+from metrics import Trace
+
+
+# 读取数据：各年份文件在进程内只解析一次，文件修改后自动重新加载
+def load_data(directory, start_year, end_year):
+    return get_dataset(directory).load(start_year, end_year)
+
+
+# 电影节点的属性及缺失时的默认值
+film_defaults = {
+    'rotten_tomatoes': 'N/A',
+    'audience_score': 'N/A',
+    'domestic_gross': 0,
+    'foreign_gross': 0,
+    'worldwide_gross': 0,
+    'budget': 0,
+    'oscar': 'N/A',
+    'bafta': 'N/A'
+}
+
+
+# 汇总节点的悬停提示
+aggregate_hover_template = (
+    "{group}<br>{count} {films} (click to {action})"
+    "<br>Worldwide Gross: ${worldwide_gross:,.0f}m<br>Budget: ${budget:,.0f}m"
+)
+
+
+# 把各分组的电影合并为一个汇总节点，记录电影数以及全球票房和预算之和
+# partial 中的分组已显示了一部分电影，汇总节点只代表其余的电影
+def add_aggregate_nodes(G, data, groups, level, partial=()):
+    totals = pd.DataFrame({
+        'group': groups,
+        'worldwide_gross': pd.to_numeric(data['worldwide_gross'], errors='coerce'),
+        'budget': pd.to_numeric(data['budget'], errors='coerce')
+    }).groupby('group').agg(count=('budget', 'size'), worldwide_gross=('worldwide_gross', 'sum'), budget=('budget', 'sum'))
+    for group, row in totals.iterrows():
+        attributes = dict(group=group, count=int(row['count']), worldwide_gross=float(row['worldwide_gross']),
+                          budget=float(row['budget']))
+        films, action = ('more films', 'show more') if group in partial else ('films', 'expand')
+        name = f"{group} ({attributes['count']} {films})"
+        hover = aggregate_hover_template.format(films=films, action=action, **attributes)
+        G.add_node(name, level=level, aggregate=True, hover=hover, **attributes)
+        G.add_edge(group, name)
+
+
+# 按给定的分组列（如 ['genre'] 或 ['genre', 'major_studio']）构建 根 -> 各级分组 -> 电影 的树
+# 第一级分组节点以取值本身命名，更深的分组节点以 "上级 / 取值" 命名，保证同名分组在不同上级下互不合并
+# 给定 max_films 时，电影数超过它的最底层分组折叠为一个汇总节点；分组在 expanded 中每出现一次，
+# 就按全球票房从高到低多显示 max_films 部电影，其余的仍留在汇总节点中，渲染的节点数因此保持有界
+def build_tree(data, levels, root, leaf='film', max_films=None, expanded=()):
+    if data is None:
+        raise ValueError("Input data is None.")
+
+    G = nx.DiGraph()
+    G.add_node(root, level=0)
+
+    # 删除分组列或电影名称缺失的行
+    data = data.dropna(subset=levels + [leaf])
+
+    # 逐级批量添加分组节点和边
+    parents = pd.Series(root, index=data.index)
+    for depth, column in enumerate(levels, start=1):
+        if depth == 1:
+            nodes = data[column]
+        else:
+            nodes = parents.astype(str) + ' / ' + data[column].astype(str)
+        edges = pd.DataFrame({'parent': parents, 'child': nodes}).drop_duplicates()
+        G.add_nodes_from(edges['child'], level=depth)
+        G.add_edges_from(zip(edges['parent'], edges['child']))
+        parents = nodes
+
+    if max_films is not None:
+        large = parents.map(parents.value_counts()) > max_films
+        pages = parents.map(pd.Series(list(expanded), dtype=object).value_counts()).fillna(0)
+        gross = pd.to_numeric(data['worldwide_gross'], errors='coerce').fillna(float('-inf'))
+        rank = gross.groupby(parents).rank(method='first', ascending=False) - 1
+        collapsed = large & (rank >= pages * max_films)
+        opened = parents[large & (pages > 0)].unique()
+        if collapsed.any():
+            add_aggregate_nodes(G, data[collapsed], parents[collapsed], len(levels) + 1, partial=set(opened))
+        # 已展开的大分组可以再次点击折叠
+        G.add_nodes_from(opened, collapsible=True)
+        data, parents = data[~collapsed], parents[~collapsed]
+
+    # 按列一次性计算电影节点属性，缺失值替换为默认值
+    attributes = pd.DataFrame({'level': len(levels) + 1, 'genre': data['genre']}, index=data.index)
+    if 'year' in data:
+        attributes['year'] = data['year']
+    if 'hover_text' in data:
+        attributes['hover'] = data['hover_text']
+    for column, default in film_defaults.items():
+        attributes[column] = data[column].astype(object).where(data[column].notna(), default)
+    # 逐列转为列表后再按行组装字典，比 to_dict('records') 快数倍
+    names = list(attributes.columns)
+    records = [dict(zip(names, row)) for row in zip(*(attributes[name].tolist() for name in names))]
+    # Arrow 字符串列逐个迭代很慢，先整体转为列表
+    films = data[leaf].tolist()
+    G.add_nodes_from(zip(films, records))
+    G.add_edges_from(zip(parents.tolist(), films))
+    return G
+
+
+# 构建电影类型树
+def build_genre_tree(data, **options):
+    return build_tree(data, ['genre'], "Movies by Genre", **options)
+
+
+# 构建电影公司树
+def build_studio_tree(data, **options):
+    return build_tree(data, ['major_studio'], "Movies by Studio", **options)
+
+
+# 树的构建函数，按 tree-type 的取值选择
+tree_builders = {'genre': build_genre_tree, 'studio': build_studio_tree}
+
+
+# 节点的悬停提示文字：电影节点使用加载时预先生成的文字，分组节点按同样的格式现场生成
+def node_hover_text(node, attributes):
+    if 'hover' in attributes:
+        return attributes['hover']
+    return hover_template.format(
+        name=node,
+        genre=attributes.get('genre', 'N/A'),
+        rotten_tomatoes=attributes.get('rotten_tomatoes', 'N/A'),
+        audience_score=attributes.get('audience_score', 'N/A'),
+        oscar=attributes.get('oscar', 'N/A'),
+        bafta=attributes.get('bafta', 'N/A'),
+        **{column: f"{float(attributes.get(column, 0)):,.0f}" for column in money_columns}
+    )
+
+
+# 节点样式（颜色除外，颜色按层级设置）
+def node_marker():
+    return dict(
+        showscale=True,
+        colorscale='YlGnBu',
+        size=12,
+        colorbar=dict(
+            thickness=15,
+            title='Node Levels',
+            xanchor='left',
+            titleside='right'
+        ),
+        line_width=2)
+
+
+# 图表布局
+def tree_figure_layout():
+    return go.Layout(
+        title='Tree Visualization',
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=0, l=0, r=0, t=40),
+        annotations=[dict(
+            text="Tree Visualization",
+            showarrow=False,
+            xref="paper", yref="paper",
+            x=0.005, y=-0.002)],
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(showgrid=False, zeroline=False),
+        width=1200,  # 调整宽度
+        height=800  # 调整高度
+    )
+
+
+# 节点数超过该值时使用 Scattergl（WebGL）代替 SVG 的 Scatter
+webgl_threshold = 2000
+
+
+# 可视化树
+# key 为构建 G 的输入（见 update_tree），省略时按图结构求哈希
+def visualize_tree(G, layout='spring', trace=None, key=None):
+    trace = trace or Trace('visualize_tree')
+    # 相同结构直接复用缓存的布局，结构变化时从各节点上次的位置热启动
+    with trace.span('layout'):
+        pos = layout_cache.layout(G, layout, key)
+    with trace.span('figure'):
+        return tree_figure(G, pos)
+
+
+# 根据节点位置组装图表
+def tree_figure(G, pos):
+
+    edge_x = []
+    edge_y = []
+
+    for edge in G.edges():
+        x0, y0 = pos[edge[0]]
+        x1, y1 = pos[edge[1]]
+        edge_x.append(x0)
+        edge_x.append(x1)
+        edge_x.append(None)
+        edge_y.append(y0)
+        edge_y.append(y1)
+        edge_y.append(None)
+
+    # 节点较多时改用 WebGL 渲染，浏览器中平移、缩放和悬停仍然流畅
+    scatter = go.Scattergl if G.number_of_nodes() > webgl_threshold else go.Scatter
+
+    edge_trace = scatter(
+        x=edge_x, y=edge_y,
+        line=dict(width=1.5, color='#888'),
+        hoverinfo='none',
+        mode='lines')
+
+    # 一次遍历节点，取出坐标、颜色（按层级）和预先生成的悬停文字
+    nodes = list(G.nodes(data=True))
+    node_x = [pos[node][0] for node, _ in nodes]
+    node_y = [pos[node][1] for node, _ in nodes]
+    node_color = [attributes['level'] for _, attributes in nodes]
+    node_text = [node_hover_text(node, attributes) for node, attributes in nodes]
+
+    # 点击时的操作：汇总节点为 [分组, 'expand']，已展开的大分组为 [自身, 'collapse']，其余节点为 None
+    node_group = [[attributes['group'], 'expand'] if attributes.get('aggregate')
+                  else [node, 'collapse'] if attributes.get('collapsible') else None
+                  for node, attributes in nodes]
+
+    node_trace = scatter(
+        x=node_x, y=node_y,
+        mode='markers',
+        hoverinfo='text',
+        text=node_text,
+        customdata=node_group,
+        marker=dict(color=node_color, **node_marker())
+    )
+
+    fig = go.Figure(data=[edge_trace, node_trace], layout=tree_figure_layout())
+    return fig
+
+
+def filter_graph(G, search_value, index=None):
+    """
+    Filter the graph to show only the nodes that match the search value and their direct connections.
+
+    With a SearchIndex the matching names are looked up in the index instead of scanning
+    every node. A matching leaf (a film) is shown together with its parent.
+    """
+    # 将搜索值转化为小写以进行不区分大小写的匹配
+    search_value = search_value.lower()
+    if index is not None:
+        matches = [name for name in index.matching_names(search_value) if name in G]
+        # 根节点名称不在索引中，单独检查
+        matches += [node for node, degree in G.in_degree() if degree == 0 and search_value in str(node).lower()]
+    else:
+        # 确保节点名称是字符串类型
+        matches = [node for node in G if search_value in str(node).lower()]
+
+    filtered_graph = nx.DiGraph()
+    for node in matches:
+        # 添加当前节点
+        filtered_graph.add_node(node, **G.nodes[node])
+        # 添加与当前节点相连的所有边和节点
+        for edge in G.edges(node, data=True):
+            filtered_graph.add_edge(edge[0], edge[1], **edge[2])
+            filtered_graph.add_node(edge[1], **G.nodes[edge[1]])
+        # 叶子节点（电影）同时显示其上级节点
+        if G.out_degree(node) == 0:
+            for parent in G.predecessors(node):
+                filtered_graph.add_node(parent, **G.nodes[parent])
+                filtered_graph.add_edge(parent, node, **G.edges[parent, node])
+
+    return filtered_graph